@@ -1,9 +1,57 @@
 import logging
+import socket
 import customtkinter as ctk
 
 # Database Config
 DB_NAME = "url_manager.db"
 
+# Network Config
+HTTP_CACHE_DIR = "http_cache"
+HTTP_CACHE_MAX_BYTES = 50 * 1024 * 1024  # Least recently used responses are evicted above this
+HTTP_POOL_SIZE = 10  # Connections kept per host; should cover the largest worker count below
+
+# Link Health Config
+LINK_CHECK_WORKERS = 10
+LINK_CHECK_TIMEOUT = 5
+LINK_CHECK_REWRITE_MOVED = True  # Replace permanently redirected URLs with their new location
+
+# Chapter Tracking Config
+# Per-domain rules for finding the latest chapter on a series page. Each rule is either
+# {"pattern": regex with a (?P<chapter>...) group and optional (?P<title>...) group}
+# or {"selector": CSS selector}. Subdomains use their parent domain's rule; "*" is the fallback.
+# The first match on the page is taken, so a rule must point at the newest chapter; sites
+# without a rule show no chapter rather than a wrong one (e.g. "Chapter 1" of an oldest-first list).
+# e.g. "example-novels.com": {"selector": "ul.chapter-list li:first-child a"}
+#      "*": {"pattern": r"<a\b[^>]*>\s*(?P<title>(?:Chapter|Ch\.?|Episode)\s*(?P<chapter>\d+(?:\.\d+)?)[^<]*)</a>"}
+CHAPTER_EXTRACTORS = {}
+CHAPTER_CHECK_WORKERS = 8
+CHAPTER_CHECK_TIMEOUT = 10
+CHAPTER_CHECK_MAX_BYTES = 512 * 1024  # Stop reading a page after this much if nothing matched
+FEED_RETRY_DAYS = 30  # Look again for a feed on sites that had none after this many days
+
+# Update History Config
+HISTORY_STORE_SNAPSHOTS = True  # Keep the extracted chapter title with each history event
+HISTORY_KEEP_ALL_DAYS = 30      # Every event is kept this long...
+HISTORY_KEEP_DAILY_DAYS = 180   # ...then one per day until this age, then one per week
+HISTORY_COMPACT_DELAY_MS = 60 * 1000  # Compaction starts this long after launch
+
+# Open Tracking Config
+OPEN_EVENTS_FLUSH_INTERVAL = 5  # Seconds between batched writes of "link opened" events
+OPEN_EVENTS_MAX_PENDING = 50    # Write early once this many events are waiting
+
+# Tags Config
+IMPORT_FOLDERS_AS_TAGS = True  # Tag imported bookmarks with every folder on their path
+
+# Sync Config
+# A folder every machine can reach (network share, Dropbox, Syncthing...); None turns sync off
+SYNC_FOLDER = None
+SYNC_NODE_ID = socket.gethostname()  # This machine's sub-folder in SYNC_FOLDER; must differ per machine
+
+# Startup Snapshot Config
+SNAPSHOT_FILE = "view_snapshot.json"  # Last view, drawn before the database is opened
+SNAPSHOT_ICON_DIR = "icon_cache"
+SNAPSHOT_MAX_ROWS = 60
+
 # UI Config
 THEME_MODE = "System"
 THEME_COLOR = "blue"
@@ -1,12 +1,63 @@
 import sqlite3
 import logging
-from datetime import datetime
+import json
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta
 from urllib.parse import urlparse
 
+# Columns every URL listing returns, in the order create_url_card unpacks them
+URL_CARD_COLUMNS = "u.id, u.title, u.url, u.favicon_blob, u.latest_chapter, u.has_update"
+
+# Sort orders accepted by get_urls_by_group; each one is backed by an index on urls
+URL_SORT_ORDERS = {
+    "default": "",
+    "recent": "ORDER BY u.last_opened DESC",
+    "popular": "ORDER BY u.open_count DESC, u.last_opened DESC",
+}
+
+# url_history.kind values
+HISTORY_CHAPTER = 1
+HISTORY_STATUS = 2
+
+# Snapshots shorter than this are stored as plain TEXT; zlib only pays off on longer content
+SNAPSHOT_COMPRESS_MIN = 64
+DAY_SECONDS = 86400
+WEEK_SECONDS = 7 * DAY_SECONDS
+
+
+# Journal triggers stay quiet while apply_changes replays another machine's edits
+JOURNAL_GUARD = "(SELECT value FROM sync_state WHERE key = 'replaying') = 0"
+JOURNAL_TICK = "UPDATE sync_state SET value = value + 1 WHERE key = 'clock';"
+
+
+def journal_insert(entity, key, field, value, source=""):
+    """SQL appending one field change to change_log, stamped with the current clock and this node."""
+    return f"""
+        INSERT INTO change_log (clock, node, entity, key, field, value)
+        SELECT (SELECT value FROM sync_state WHERE key = 'clock'),
+               (SELECT value FROM sync_state WHERE key = 'node'),
+               '{entity}', {key}, {field}, {value} {source};"""
+
+
+def encode_snapshot(text):
+    """Stores short text as-is and longer text as a zlib BLOB, so the column type tells them apart."""
+    if text is None or len(text) < SNAPSHOT_COMPRESS_MIN:
+        return text
+    return zlib.compress(text.encode("utf-8"), 9)
+
+
+def decode_snapshot(value):
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
 class DatabaseManager:
-    def __init__(self, db_name):
+    def __init__(self, db_name, store_snapshots=True, node_id=None):
         self.db_name = db_name
         self.memory_conn = None
+        self.store_snapshots = store_snapshots
         
         # If we are testing in memory, we MUST keep one connection open forever
         # otherwise the DB is wiped every time a function finishes.
@@ -15,7 +66,7 @@ class DatabaseManager:
             # Allow accessing columns by name if needed later
             self.memory_conn.row_factory = sqlite3.Row 
             
-        self.init_db()
+        self.init_db(node_id)
 
     def _get_conn(self):
         """Helper to get the correct connection context."""
@@ -24,11 +75,13 @@ class DatabaseManager:
         else:
             return sqlite3.connect(self.db_name)
 
-    def init_db(self):
+    def init_db(self, node_id=None):
         try:
             # We don't use 'with' here because we don't want to close memory connections
             conn = self._get_conn()
             cursor = conn.cursor()
+            # Only takes effect on a brand new file; older files are converted by compact_history
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS groups (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -43,9 +96,66 @@ class DatabaseManager:
                     group_id INTEGER,
                     favicon_blob BLOB,
                     last_opened DATETIME,
+                    status_code INTEGER,
+                    final_url TEXT,
+                    last_checked DATETIME,
+                    latest_chapter REAL,
+                    chapter_title TEXT,
+                    seen_chapter REAL,
+                    has_update INTEGER NOT NULL DEFAULT 0,
+                    chapter_checked DATETIME,
+                    open_count INTEGER NOT NULL DEFAULT 0,
+                    feed_matched INTEGER NOT NULL DEFAULT 0,
                     FOREIGN KEY(group_id) REFERENCES groups(id) ON DELETE CASCADE
                 )
             """)
+            # Older databases were created before these columns existed
+            self._ensure_columns(cursor, "urls", {
+                "status_code": "INTEGER",
+                "final_url": "TEXT",
+                "last_checked": "DATETIME",
+                "latest_chapter": "REAL",
+                "chapter_title": "TEXT",
+                "seen_chapter": "REAL",
+                "has_update": "INTEGER NOT NULL DEFAULT 0",
+                "chapter_checked": "DATETIME",
+                "open_count": "INTEGER NOT NULL DEFAULT 0",
+                "feed_matched": "INTEGER NOT NULL DEFAULT 0",
+            })
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_urls_status ON urls(status_code)")
+            # Group views and "All URLs" each need their own index to read rows already sorted
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_urls_group_recent ON urls(group_id, last_opened)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_urls_group_popular ON urls(group_id, open_count, last_opened)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_urls_recent ON urls(last_opened)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_urls_popular ON urls(open_count, last_opened)")
+            # Append-only event log; ts is unix seconds to keep rows small
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS url_history (
+                    id INTEGER PRIMARY KEY,
+                    url_id INTEGER NOT NULL,
+                    ts INTEGER NOT NULL,
+                    kind INTEGER NOT NULL,
+                    value REAL,
+                    snapshot,
+                    FOREIGN KEY(url_id) REFERENCES urls(id) ON DELETE CASCADE
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_history_url_ts ON url_history(url_id, ts)")
+            # One row per site; feed_url is NULL when discovery found no feed
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS feeds (
+                    domain TEXT PRIMARY KEY,
+                    feed_url TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    last_entry_id TEXT,
+                    discovered DATETIME,
+                    last_polled DATETIME
+                )
+            """)
+            self._create_group_counters(cursor)
+            self._create_tags(cursor)
+            self._create_journal(cursor, node_id)
             cursor.execute("INSERT OR IGNORE INTO groups (name) VALUES (?)", ("General",))
             conn.commit()
             
@@ -56,10 +166,254 @@ class DatabaseManager:
         except sqlite3.Error as e:
             logging.error(f"Database Initialization Error: {e}")
 
-    def get_groups(self):
+    def _ensure_columns(self, cursor, table, columns):
+        """Adds any of `columns` ({name: type}) that are missing from `table`."""
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        for name, col_type in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+
+    def _create_group_counters(self, cursor):
+        """
+        Creates group_counters (links and unread updates per group) and the triggers
+        that keep it in step with urls, so the sidebar never has to COUNT(*).
+        """
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='group_counters'"
+        ).fetchone()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS group_counters (
+                group_id INTEGER PRIMARY KEY,
+                total INTEGER NOT NULL DEFAULT 0,
+                unread INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        if not exists:
+            # One full recount when upgrading an existing library; triggers take over from here
+            cursor.execute("""
+                INSERT INTO group_counters (group_id, total, unread)
+                SELECT g.id, COUNT(u.id), COALESCE(SUM(u.has_update != 0), 0)
+                FROM groups g LEFT JOIN urls u ON u.group_id = g.id
+                GROUP BY g.id
+            """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_groups_insert_counter AFTER INSERT ON groups
+            BEGIN
+                INSERT OR IGNORE INTO group_counters (group_id) VALUES (NEW.id);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_groups_delete_counter AFTER DELETE ON groups
+            BEGIN
+                DELETE FROM group_counters WHERE group_id = OLD.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_urls_insert_counter AFTER INSERT ON urls
+            BEGIN
+                UPDATE group_counters SET total = total + 1, unread = unread + (NEW.has_update != 0)
+                WHERE group_id = NEW.group_id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_urls_delete_counter AFTER DELETE ON urls
+            BEGIN
+                UPDATE group_counters SET total = total - 1, unread = unread - (OLD.has_update != 0)
+                WHERE group_id = OLD.group_id;
+            END
+        """)
+        # Covers moves between groups and the unread flag being raised or cleared
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_urls_update_counter AFTER UPDATE OF group_id, has_update ON urls
+            WHEN OLD.group_id IS NOT NEW.group_id OR (OLD.has_update != 0) != (NEW.has_update != 0)
+            BEGIN
+                UPDATE group_counters SET total = total - 1, unread = unread - (OLD.has_update != 0)
+                WHERE group_id = OLD.group_id;
+                UPDATE group_counters SET total = total + 1, unread = unread + (NEW.has_update != 0)
+                WHERE group_id = NEW.group_id;
+            END
+        """)
+
+    def _create_tags(self, cursor):
+        """
+        Creates tags and the url_tags junction table. A link can carry any number of tags
+        on top of its single group; tags.url_count is kept by triggers so filters can
+        start from the smallest tag without counting.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS tags (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL,
+                url_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # (tag_id, url_id) serves "links with this tag"; the index serves "tags of this link"
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS url_tags (
+                tag_id INTEGER NOT NULL,
+                url_id INTEGER NOT NULL,
+                PRIMARY KEY (tag_id, url_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_url_tags_url ON url_tags(url_id, tag_id)")
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_url_tags_insert_count AFTER INSERT ON url_tags
+            BEGIN
+                UPDATE tags SET url_count = url_count + 1 WHERE id = NEW.tag_id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_url_tags_delete_count AFTER DELETE ON url_tags
+            BEGIN
+                UPDATE tags SET url_count = url_count - 1 WHERE id = OLD.tag_id;
+            END
+        """)
+        # Every way of deleting links (single, bulk, whole group) drops their tags too
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_urls_delete_tags AFTER DELETE ON urls
+            BEGIN
+                DELETE FROM url_tags WHERE url_id = OLD.id;
+            END
+        """)
+
+    def _create_journal(self, cursor, node_id):
+        """
+        Creates the sync journal: change_log holds one row per changed field of a group
+        or link, keyed by name / URL so it means the same thing on every machine, and
+        stamped with a Lamport clock and the node that made the change. Triggers write
+        it, so every mutation path is journaled in the same transaction as the change.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                key TEXT PRIMARY KEY,
+                value
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO sync_state (key, value) VALUES ('node', ?)",
+                       (node_id or uuid.uuid4().hex,))
+        if node_id:
+            # A library copied from another machine must not keep writing under its old name
+            cursor.execute("UPDATE sync_state SET value = ? WHERE key = 'node'", (node_id,))
+        cursor.execute("INSERT OR IGNORE INTO sync_state (key, value) VALUES ('clock', 0)")
+        cursor.execute("INSERT OR IGNORE INTO sync_state (key, value) VALUES ('replaying', 0)")
+
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='change_log'"
+        ).fetchone()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY,
+                clock INTEGER NOT NULL,
+                node TEXT NOT NULL,
+                entity TEXT NOT NULL,
+                key TEXT NOT NULL,
+                field TEXT NOT NULL,
+                value,
+                origin_local INTEGER NOT NULL DEFAULT 1
+            )
+        """)
+        if exists and "origin_local" not in {row[1] for row in cursor.execute("PRAGMA table_info(change_log)")}:
+            # Rows from a journal that predates the flag were written locally unless a peer sent them
+            self._ensure_columns(cursor, "change_log", {"origin_local": "INTEGER NOT NULL DEFAULT 1"})
+            cursor.execute("""
+                UPDATE change_log SET origin_local = 0
+                WHERE 'peer:' || node IN (SELECT key FROM sync_state)
+            """)
+        # Finds the newest version of a field for last-writer-wins
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_field ON change_log(entity, key, field, clock)")
+        if not exists:
+            # An existing library becomes the first batch of changes, so other machines can catch up
+            cursor.execute("UPDATE sync_state SET value = 1 WHERE key = 'clock'")
+            node = "(SELECT value FROM sync_state WHERE key = 'node')"
+            cursor.execute(f"""
+                INSERT INTO change_log (clock, node, entity, key, field, value)
+                SELECT 1, {node}, 'group', name, 'present', 1 FROM groups
+            """)
+            for field, value in (("present", "1"), ("title", "u.title"), ("group", "g.name")):
+                cursor.execute(f"""
+                    INSERT INTO change_log (clock, node, entity, key, field, value)
+                    SELECT 1, {node}, 'url', u.url, '{field}', {value}
+                    FROM urls u LEFT JOIN groups g ON g.id = u.group_id
+                """)
+            cursor.execute(f"""
+                INSERT INTO change_log (clock, node, entity, key, field, value)
+                SELECT 1, {node}, 'url', u.url, 'tag:' || t.name, 1
+                FROM url_tags ut JOIN urls u ON u.id = ut.url_id JOIN tags t ON t.id = ut.tag_id
+            """)
+
+        group_name = "(SELECT name FROM groups WHERE id = NEW.group_id)"
+        triggers = {
+            "trg_journal_groups_insert": ("AFTER INSERT ON groups", "",
+                                          journal_insert("group", "NEW.name", "'present'", 1)),
+            "trg_journal_groups_delete": ("AFTER DELETE ON groups", "",
+                                          journal_insert("group", "OLD.name", "'present'", 0)),
+            "trg_journal_urls_insert": ("AFTER INSERT ON urls", "",
+                                        journal_insert("url", "NEW.url", "'present'", 1)
+                                        + journal_insert("url", "NEW.url", "'title'", "NEW.title")
+                                        + journal_insert("url", "NEW.url", "'group'", group_name)),
+            "trg_journal_urls_delete": ("AFTER DELETE ON urls", "",
+                                        journal_insert("url", "OLD.url", "'present'", 0)),
+            "trg_journal_urls_title": ("AFTER UPDATE OF title ON urls", "AND OLD.title IS NOT NEW.title",
+                                       journal_insert("url", "NEW.url", "'title'", "NEW.title")),
+            "trg_journal_urls_group": ("AFTER UPDATE OF group_id ON urls", "AND OLD.group_id IS NOT NEW.group_id",
+                                       journal_insert("url", "NEW.url", "'group'", group_name)),
+            # A rewritten URL is a new key: the old one goes away and the new one arrives with its fields
+            "trg_journal_urls_rename": ("AFTER UPDATE OF url ON urls", "AND OLD.url != NEW.url",
+                                        journal_insert("url", "OLD.url", "'present'", 0)
+                                        + journal_insert("url", "NEW.url", "'present'", 1)
+                                        + journal_insert("url", "NEW.url", "'title'", "NEW.title")
+                                        + journal_insert("url", "NEW.url", "'group'", group_name)
+                                        + journal_insert("url", "NEW.url", "'tag:' || t.name", 1,
+                                                         "FROM url_tags ut JOIN tags t ON t.id = ut.tag_id "
+                                                         "WHERE ut.url_id = NEW.id")),
+            "trg_journal_url_tags_insert": ("AFTER INSERT ON url_tags", "",
+                                            journal_insert("url", "u.url", "'tag:' || t.name", 1,
+                                                           "FROM urls u, tags t "
+                                                           "WHERE u.id = NEW.url_id AND t.id = NEW.tag_id")),
+            # Tags of a deleted link go with it; its 'present' change already says so
+            "trg_journal_url_tags_delete": ("AFTER DELETE ON url_tags",
+                                            "AND EXISTS (SELECT 1 FROM urls WHERE id = OLD.url_id)",
+                                            journal_insert("url", "u.url", "'tag:' || t.name", 0,
+                                                           "FROM urls u, tags t "
+                                                           "WHERE u.id = OLD.url_id AND t.id = OLD.tag_id")),
+        }
+        for name, (event, condition, body) in triggers.items():
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {name} {event}
+                WHEN {JOURNAL_GUARD} {condition}
+                BEGIN
+                    {JOURNAL_TICK}
+                    {body}
+                END
+            """)
+        # Links left in General because their group was deleted elsewhere go back when it
+        # is re-created, here or by a peer; locally the move is journaled like any other
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_groups_adopt_links AFTER INSERT ON groups
+            WHEN NEW.name != 'General'
+            BEGIN
+                UPDATE urls SET group_id = NEW.id
+                WHERE group_id = (SELECT id FROM groups WHERE name = 'General')
+                  AND (SELECT c.value FROM change_log c
+                       WHERE c.entity = 'url' AND c.key = urls.url AND c.field = 'group'
+                       ORDER BY c.clock DESC, c.node DESC LIMIT 1) = NEW.name;
+            END
+        """)
+
+    def get_groups(self, with_counts=False):
+        """
+        Returns group names, or (name, total, unread) tuples when `with_counts` is set.
+        Counts come from group_counters, so this stays one primary-key join.
+        """
         conn = self._get_conn()
         try:
             cursor = conn.cursor()
+            if with_counts:
+                return [tuple(row) for row in cursor.execute("""
+                    SELECT g.name, COALESCE(c.total, 0), COALESCE(c.unread, 0)
+                    FROM groups g LEFT JOIN group_counters c ON c.group_id = g.id
+                    ORDER BY g.id
+                """)]
             result = [row[0] for row in cursor.execute("SELECT name FROM groups")]
             return result
         finally:
@@ -85,6 +439,9 @@ class DatabaseManager:
             result = cursor.fetchone()
             if result:
                 group_id = result[0]
+                cursor.execute("""
+                    DELETE FROM url_history WHERE url_id IN (SELECT id FROM urls WHERE group_id=?)
+                """, (group_id,))
                 cursor.execute("DELETE FROM urls WHERE group_id=?", (group_id,))
                 cursor.execute("DELETE FROM groups WHERE id=?", (group_id,))
                 conn.commit()
@@ -129,15 +486,33 @@ class DatabaseManager:
             group_map = {row[0]: row[1] for row in cursor.fetchall()}
 
             insert_list = []
-            for title, url, g_name in url_data_list:
+            tag_pairs = []
+            for item in url_data_list:
+                title, url, g_name = item[:3]
                 g_id = group_map.get(g_name)
                 if g_id:
                     insert_list.append((title, url, g_id, None, datetime.now().isoformat()))
+                    # Optional 4th element: tag names, e.g. the bookmark's folder path
+                    if len(item) > 3:
+                        tag_pairs.extend([url, tag] for tag in item[3] if tag)
             
             cursor.executemany("""
                 INSERT OR IGNORE INTO urls (title, url, group_id, favicon_blob, last_opened)
                 VALUES (?, ?, ?, ?, ?)
             """, insert_list)
+            if tag_pairs:
+                pairs_json = json.dumps(tag_pairs)
+                cursor.execute("""
+                    INSERT OR IGNORE INTO tags (name)
+                    SELECT DISTINCT json_extract(value, '$[1]') FROM json_each(?)
+                """, (pairs_json,))
+                cursor.execute("""
+                    INSERT OR IGNORE INTO url_tags (tag_id, url_id)
+                    SELECT t.id, u.id
+                    FROM json_each(?) AS p
+                    JOIN urls u ON u.url = json_extract(p.value, '$[0]')
+                    JOIN tags t ON t.name = json_extract(p.value, '$[1]')
+                """, (pairs_json,))
             conn.commit()
             return len(insert_list)
         except sqlite3.Error as e:
@@ -147,15 +522,16 @@ class DatabaseManager:
             if not self.memory_conn:
                 conn.close()
 
-    def get_urls_by_group(self, group_name):
-        query = """
-            SELECT u.id, u.title, u.url, u.favicon_blob 
+    def get_urls_by_group(self, group_name, sort="default"):
+        query = f"""
+            SELECT {URL_CARD_COLUMNS}
             FROM urls u
             JOIN groups g ON u.group_id = g.id
             WHERE g.name = ?
         """
         if group_name == "All URLs":
-            query = "SELECT id, title, url, favicon_blob FROM urls"
+            query = f"SELECT {URL_CARD_COLUMNS} FROM urls u"
+        query += " " + URL_SORT_ORDERS[sort]
             
         conn = self._get_conn()
         try:
@@ -170,8 +546,750 @@ class DatabaseManager:
     def delete_url(self, url_id):
         conn = self._get_conn()
         try:
-            conn.cursor().execute("DELETE FROM urls WHERE id=?", (url_id,))
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM url_history WHERE url_id=?", (url_id,))
+            cursor.execute("DELETE FROM urls WHERE id=?", (url_id,))
+            conn.commit()
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    # --- BULK OPERATIONS ---
+    # Each takes the whole selection as one JSON parameter, so a single set-based
+    # statement handles any number of rows without hitting SQLite's variable limit.
+
+    def delete_urls(self, url_ids):
+        """Deletes every URL in `url_ids` (and its history) in one transaction. Returns the count."""
+        conn = self._get_conn()
+        try:
+            ids_json = json.dumps(list(url_ids))
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM url_history WHERE url_id IN (SELECT value FROM json_each(?))", (ids_json,))
+            cursor.execute("DELETE FROM urls WHERE id IN (SELECT value FROM json_each(?))", (ids_json,))
+            deleted = cursor.rowcount
+            conn.commit()
+            return deleted
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Bulk delete error: {e}")
+            return 0
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def move_urls(self, url_ids, group_name):
+        """Moves every URL in `url_ids` to an existing group. Returns the number moved."""
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            group = cursor.execute("SELECT id FROM groups WHERE name=?", (group_name,)).fetchone()
+            if not group:
+                return 0
+            cursor.execute("""
+                UPDATE urls SET group_id = ?
+                WHERE id IN (SELECT value FROM json_each(?)) AND group_id IS NOT ?
+            """, (group[0], json.dumps(list(url_ids)), group[0]))
+            moved = cursor.rowcount
             conn.commit()
+            return moved
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Bulk move error: {e}")
+            return 0
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def retitle_urls(self, titles):
+        """Applies a {url_id: new_title} mapping in one statement. Returns the number renamed."""
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            # A correlated subquery rather than UPDATE ... FROM, which needs SQLite 3.33+
+            titles_json = json.dumps({str(url_id): title for url_id, title in titles.items()})
+            cursor.execute("""
+                UPDATE urls SET title = (SELECT value FROM json_each(?) WHERE key = CAST(urls.id AS TEXT))
+                WHERE id IN (SELECT CAST(key AS INTEGER) FROM json_each(?))
+            """, (titles_json, titles_json))
+            renamed = cursor.rowcount
+            conn.commit()
+            return renamed
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Bulk retitle error: {e}")
+            return 0
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    # --- TAGS ---
+
+    def get_tags(self, with_counts=False):
+        """Returns tag names, or (name, url_count) tuples, in alphabetical order."""
+        conn = self._get_conn()
+        try:
+            rows = conn.cursor().execute("SELECT name, url_count FROM tags ORDER BY name").fetchall()
+            if with_counts:
+                return [tuple(row) for row in rows]
+            return [row[0] for row in rows]
         finally:
             if not self.memory_conn:
-                conn.close()
\ No newline at end of file
+                conn.close()
+
+    def delete_tag(self, name):
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM url_tags WHERE tag_id = (SELECT id FROM tags WHERE name = ?)", (name,))
+            cursor.execute("DELETE FROM tags WHERE name = ?", (name,))
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error deleting tag: {e}")
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def tag_urls(self, url_ids, tag_names):
+        """Adds every tag in `tag_names` (created if new) to every URL in `url_ids`. Returns the links added."""
+        names = [name.strip() for name in tag_names if name.strip()]
+        if not names:
+            return 0
+        conn = self._get_conn()
+        try:
+            names_json = json.dumps(names)
+            cursor = conn.cursor()
+            cursor.execute("INSERT OR IGNORE INTO tags (name) SELECT value FROM json_each(?)", (names_json,))
+            cursor.execute("""
+                INSERT OR IGNORE INTO url_tags (tag_id, url_id)
+                SELECT t.id, u.id
+                FROM tags t, urls u
+                WHERE t.name IN (SELECT value FROM json_each(?))
+                  AND u.id IN (SELECT value FROM json_each(?))
+            """, (names_json, json.dumps(list(url_ids))))
+            added = cursor.rowcount
+            conn.commit()
+            return added
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error tagging URLs: {e}")
+            return 0
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def untag_urls(self, url_ids, tag_names):
+        """Removes the given tags from the given URLs. Returns the links removed."""
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                DELETE FROM url_tags
+                WHERE tag_id IN (SELECT id FROM tags WHERE name IN (SELECT value FROM json_each(?)))
+                  AND url_id IN (SELECT value FROM json_each(?))
+            """, (json.dumps(list(tag_names)), json.dumps(list(url_ids))))
+            removed = cursor.rowcount
+            conn.commit()
+            return removed
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error untagging URLs: {e}")
+            return 0
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def get_url_tags(self, url_id):
+        conn = self._get_conn()
+        try:
+            return [row[0] for row in conn.cursor().execute("""
+                SELECT t.name FROM url_tags ut JOIN tags t ON t.id = ut.tag_id
+                WHERE ut.url_id = ? ORDER BY t.name
+            """, (url_id,))]
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def get_urls_by_tags(self, all_of=(), any_of=(), none_of=(), group_name=None, sort="default"):
+        """
+        Card rows carrying every tag in `all_of`, at least one in `any_of` and none in
+        `none_of`, optionally limited to one group ("All URLs" or None means every group).
+
+        With `all_of`, the query is driven from the tag with the fewest links and every
+        other required tag is a primary-key probe per candidate, so the cost follows the
+        smallest tag rather than the library size.
+        """
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            names = set(all_of) | set(any_of) | set(none_of)
+            info = {row[0]: (row[1], row[2]) for row in cursor.execute(
+                "SELECT name, id, url_count FROM tags WHERE name IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted(names)),)
+            )}
+            if any(name not in info for name in all_of):
+                return []
+            any_ids = [info[name][0] for name in any_of if name in info]
+            if any_of and not any_ids:
+                return []
+            none_ids = [info[name][0] for name in none_of if name in info]
+            required = sorted({info[name] for name in all_of}, key=lambda tag: tag[1])
+
+            where = []
+            params = []
+            if required:
+                # CROSS JOIN pins the join order: smallest tag first, then urls by rowid
+                source = "url_tags d CROSS JOIN urls u"
+                where += ["d.tag_id = ?", "u.id = d.url_id"]
+                params.append(required[0][0])
+                for tag_id, _ in required[1:]:
+                    where.append("EXISTS (SELECT 1 FROM url_tags WHERE tag_id = ? AND url_id = u.id)")
+                    params.append(tag_id)
+                if any_ids:
+                    where.append("""EXISTS (SELECT 1 FROM url_tags
+                                    WHERE url_id = u.id AND tag_id IN (SELECT value FROM json_each(?)))""")
+                    params.append(json.dumps(any_ids))
+            else:
+                source = "urls u"
+                if any_ids:
+                    where.append("""u.id IN (SELECT url_id FROM url_tags
+                                    WHERE tag_id IN (SELECT value FROM json_each(?)))""")
+                    params.append(json.dumps(any_ids))
+            if none_ids:
+                where.append("""NOT EXISTS (SELECT 1 FROM url_tags
+                                WHERE url_id = u.id AND tag_id IN (SELECT value FROM json_each(?)))""")
+                params.append(json.dumps(none_ids))
+            if group_name not in (None, "All URLs"):
+                where.append("u.group_id = (SELECT id FROM groups WHERE name = ?)")
+                params.append(group_name)
+
+            query = f"SELECT {URL_CARD_COLUMNS} FROM {source}"
+            if where:
+                query += " WHERE " + " AND ".join(where)
+            query += " " + URL_SORT_ORDERS[sort]
+            return cursor.execute(query, params).fetchall()
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    # --- LINK HEALTH ---
+
+    def get_urls_for_check(self):
+        conn = self._get_conn()
+        try:
+            return [(row[0], row[1]) for row in conn.cursor().execute("SELECT id, url FROM urls")]
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def update_link_status(self, results):
+        """
+        Stores the outcome of a link check.
+        `results` is a list of (url_id, status_code, final_url) tuples, written in one transaction.
+        """
+        conn = self._get_conn()
+        try:
+            checked_at = datetime.now().isoformat()
+            cursor = conn.cursor()
+            # Log only real changes, before the UPDATE overwrites the old status
+            cursor.executemany("""
+                INSERT INTO url_history (url_id, ts, kind, value, snapshot)
+                SELECT id, ?, ?, ?, ? FROM urls WHERE id = ? AND status_code IS NOT ?
+            """, [(int(time.time()), HISTORY_STATUS, status, final_url, url_id, status)
+                  for url_id, status, final_url in results])
+            cursor.executemany("""
+                UPDATE urls SET status_code = ?, final_url = ?, last_checked = ?
+                WHERE id = ?
+            """, [(status, final_url, checked_at, url_id) for url_id, status, final_url in results])
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error updating link status: {e}")
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def rewrite_moved_urls(self, moves):
+        """
+        Replaces the stored URL of every (url_id, new_url) pair in one transaction.
+        A move is skipped when `new_url` is already stored on another row, so the
+        UNIQUE constraint on urls.url is never violated. Returns the number of rows rewritten.
+        """
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            rewritten = 0
+            for url_id, new_url in moves:
+                # OR IGNORE turns a UNIQUE conflict into a no-op for this row only
+                cursor.execute("""
+                    UPDATE OR IGNORE urls SET url = ?, final_url = NULL, feed_matched = 0
+                    WHERE id = ?
+                """, (new_url, url_id))
+                rewritten += cursor.rowcount
+            conn.commit()
+            return rewritten
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error rewriting moved URLs: {e}")
+            return 0
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def get_dead_links(self, search=""):
+        """Returns checked URLs that were unreachable or answered with an error status."""
+        query = f"""
+            SELECT {URL_CARD_COLUMNS} FROM urls u
+            WHERE u.status_code IS NOT NULL AND (u.status_code = 0 OR u.status_code >= 400)
+        """
+        params = ()
+        if search:
+            query += " AND (u.title LIKE ? OR u.url LIKE ?)"
+            params = (f"%{search}%", f"%{search}%")
+        conn = self._get_conn()
+        try:
+            return conn.cursor().execute(query, params).fetchall()
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    # --- CHAPTER TRACKING ---
+
+    def save_chapter_results(self, results):
+        """
+        Stores the latest chapter found for each (url_id, chapter, title) in one transaction.
+        The first result for a URL only sets the baseline; later results raise
+        has_update when they go past the chapter the user has already seen.
+        """
+        conn = self._get_conn()
+        try:
+            checked_at = datetime.now().isoformat()
+            cursor = conn.cursor()
+            # Log only real changes, before the UPDATE overwrites the old chapter
+            snapshots = self.store_snapshots
+            cursor.executemany("""
+                INSERT INTO url_history (url_id, ts, kind, value, snapshot)
+                SELECT id, ?, ?, ?, ? FROM urls WHERE id = ? AND latest_chapter IS NOT ?
+            """, [(int(time.time()), HISTORY_CHAPTER, chapter, encode_snapshot(title) if snapshots else None,
+                   url_id, chapter) for url_id, chapter, title in results])
+            # Every right-hand side below sees the row's values from before this UPDATE
+            cursor.executemany("""
+                UPDATE urls SET
+                    has_update = CASE WHEN seen_chapter IS NOT NULL AND ? > seen_chapter
+                                      THEN 1 ELSE has_update END,
+                    seen_chapter = COALESCE(seen_chapter, ?),
+                    latest_chapter = ?,
+                    chapter_title = ?,
+                    chapter_checked = ?
+                WHERE id = ?
+            """, [(chapter, chapter, chapter, title, checked_at, url_id)
+                  for url_id, chapter, title in results])
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error saving chapter results: {e}")
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def record_opens(self, events):
+        """
+        Applies a batch of (url_id, opened_at_iso, shown_chapter) open events in one
+        transaction: bumps open_count, moves last_opened forward and marks the chapter
+        the card showed when it was clicked as seen. A newer chapter saved between the
+        click and this write stays new. Returns False if the batch could not be written.
+        """
+        totals = {}
+        for url_id, opened_at, chapter in events:
+            count, latest, seen = totals.get(url_id, (0, opened_at, None))
+            if chapter is not None:
+                seen = chapter if seen is None else max(seen, chapter)
+            totals[url_id] = (count + 1, max(latest, opened_at), seen)
+
+        conn = self._get_conn()
+        try:
+            # A click on a card without a chapter leaves the chapter state alone
+            conn.cursor().executemany("""
+                UPDATE urls SET
+                    open_count = open_count + :count,
+                    last_opened = MAX(COALESCE(last_opened, ''), :latest),
+                    seen_chapter = CASE WHEN :seen IS NULL THEN seen_chapter
+                                        ELSE MAX(COALESCE(seen_chapter, :seen), :seen) END,
+                    has_update = CASE WHEN :seen IS NULL THEN has_update
+                                      ELSE COALESCE(latest_chapter > MAX(COALESCE(seen_chapter, :seen), :seen), 0) END
+                WHERE id = :url_id
+            """, [{"count": count, "latest": latest, "seen": seen, "url_id": url_id}
+                  for url_id, (count, latest, seen) in totals.items()])
+            conn.commit()
+            return True
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error recording open events: {e}")
+            return False
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def get_chapter_check_rows(self):
+        conn = self._get_conn()
+        try:
+            return [tuple(row) for row in conn.cursor().execute(
+                "SELECT id, url, latest_chapter, feed_matched FROM urls"
+            )]
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    # --- FEEDS ---
+
+    def mark_feed_matched(self, url_ids):
+        """Records that a site feed has carried entries for these URLs, so their pages can be skipped."""
+        conn = self._get_conn()
+        try:
+            conn.cursor().execute("""
+                UPDATE urls SET feed_matched = 1
+                WHERE id IN (SELECT value FROM json_each(?)) AND feed_matched = 0
+            """, (json.dumps(list(url_ids)),))
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error marking feed matches: {e}")
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def get_feeds(self, retry_after_days=30):
+        """
+        Returns {domain: (feed_url, etag, last_modified, last_entry_id)} for every site
+        that does not need discovery. Sites without a feed are retried after `retry_after_days`.
+        """
+        cutoff = (datetime.now() - timedelta(days=retry_after_days)).isoformat()
+        conn = self._get_conn()
+        try:
+            rows = conn.cursor().execute("""
+                SELECT domain, feed_url, etag, last_modified, last_entry_id FROM feeds
+                WHERE feed_url IS NOT NULL OR discovered > ?
+            """, (cutoff,))
+            return {row[0]: tuple(row[1:]) for row in rows}
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def save_discovered_feeds(self, discovered):
+        """Stores (domain, feed_url or None) pairs, resetting any previous poll state."""
+        conn = self._get_conn()
+        try:
+            now = datetime.now().isoformat()
+            conn.cursor().executemany("""
+                INSERT OR REPLACE INTO feeds (domain, feed_url, discovered)
+                VALUES (?, ?, ?)
+            """, [(domain, feed_url, now) for domain, feed_url in discovered])
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error saving feeds: {e}")
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def update_feed_state(self, states):
+        """Stores the validators and newest entry id of each polled (domain, etag, last_modified, entry_id)."""
+        conn = self._get_conn()
+        try:
+            now = datetime.now().isoformat()
+            conn.cursor().executemany("""
+                UPDATE feeds SET etag = ?, last_modified = ?, last_entry_id = ?, last_polled = ?
+                WHERE domain = ?
+            """, [(etag, last_modified, entry_id, now, domain) for domain, etag, last_modified, entry_id in states])
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error updating feed state: {e}")
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    # --- UPDATE HISTORY ---
+
+    def record_history(self, events):
+        """Appends (url_id, kind, value, snapshot_text, ts) events; ts defaults to now."""
+        conn = self._get_conn()
+        try:
+            now = int(time.time())
+            conn.cursor().executemany("""
+                INSERT INTO url_history (url_id, ts, kind, value, snapshot) VALUES (?, ?, ?, ?, ?)
+            """, [(url_id, ts if ts is not None else now, kind, value, encode_snapshot(text))
+                  for url_id, kind, value, text, ts in events])
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error recording history: {e}")
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def get_changes_since(self, url_id, since=None):
+        """
+        Returns (ts, kind, value, snapshot_text) events for one URL newer than `since`
+        (unix seconds), oldest first. Defaults to the URL's last_opened time.
+        Served by idx_history_url_ts.
+        """
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            if since is None:
+                row = cursor.execute("SELECT last_opened FROM urls WHERE id=?", (url_id,)).fetchone()
+                since = int(datetime.fromisoformat(row[0]).timestamp()) if row and row[0] else 0
+            rows = cursor.execute("""
+                SELECT ts, kind, value, snapshot FROM url_history
+                WHERE url_id = ? AND ts > ? ORDER BY ts
+            """, (url_id, since))
+            return [(ts, kind, value, decode_snapshot(snapshot)) for ts, kind, value, snapshot in rows]
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def compact_history_batch(self, after_url_id=0, batch_size=200, now=None,
+                              keep_all_days=30, keep_daily_days=180):
+        """
+        Applies the retention policy to the history of the next `batch_size` URLs
+        after `after_url_id`, in one short transaction:
+          - younger than `keep_all_days`: everything is kept
+          - up to `keep_daily_days`: the last event per URL, kind and day
+          - older: the last event per URL, kind and week
+        Returns (last_url_id or None when done, rows deleted).
+        """
+        now = int(now if now is not None else time.time())
+        daily_cutoff = now - keep_all_days * DAY_SECONDS
+        weekly_cutoff = now - keep_daily_days * DAY_SECONDS
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            ids = [row[0] for row in cursor.execute("""
+                SELECT DISTINCT url_id FROM url_history WHERE url_id > ? ORDER BY url_id LIMIT ?
+            """, (after_url_id, batch_size))]
+            if not ids:
+                return None, 0
+            lo, hi = ids[0], ids[-1]
+
+            deleted = 0
+            # History of URLs deleted outside DatabaseManager (foreign keys are not enforced)
+            cursor.execute("""
+                DELETE FROM url_history WHERE url_id BETWEEN ? AND ?
+                AND url_id NOT IN (SELECT id FROM urls)
+            """, (lo, hi))
+            deleted += cursor.rowcount
+            for start, end, bucket in ((weekly_cutoff, daily_cutoff, DAY_SECONDS),
+                                       (0, weekly_cutoff, WEEK_SECONDS)):
+                cursor.execute("""
+                    DELETE FROM url_history
+                    WHERE url_id BETWEEN :lo AND :hi AND ts >= :start AND ts < :end
+                    AND id NOT IN (
+                        SELECT MAX(id) FROM url_history
+                        WHERE url_id BETWEEN :lo AND :hi AND ts >= :start AND ts < :end
+                        GROUP BY url_id, kind, ts / :bucket
+                    )
+                """, {"lo": lo, "hi": hi, "start": start, "end": end, "bucket": bucket})
+                deleted += cursor.rowcount
+            conn.commit()
+            return hi, deleted
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"History compaction error: {e}")
+            return None, 0
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def compact_history(self, batch_size=200, pause=0.0, now=None, keep_all_days=30, keep_daily_days=180):
+        """
+        Runs compact_history_batch over every URL, pausing between batches so the
+        UI's own queries are not starved, then returns freed pages to the OS.
+        Returns the number of history rows deleted.
+        """
+        total = 0
+        after = 0
+        while after is not None:
+            after, deleted = self.compact_history_batch(after, batch_size, now, keep_all_days, keep_daily_days)
+            total += deleted
+            if pause:
+                time.sleep(pause)
+
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                cursor.execute("PRAGMA incremental_vacuum")
+                cursor.fetchall()
+            else:
+                # Files created before auto_vacuum was set need one full VACUUM to switch over
+                cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                cursor.execute("VACUUM")
+        except sqlite3.Error as e:
+            logging.error(f"Vacuum error: {e}")
+        finally:
+            if not self.memory_conn:
+                conn.close()
+        return total
+
+    # --- SYNC JOURNAL ---
+
+    def get_node_id(self):
+        conn = self._get_conn()
+        try:
+            return conn.cursor().execute("SELECT value FROM sync_state WHERE key = 'node'").fetchone()[0]
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def get_sync_cursor(self, name):
+        """Returns a stored sync position (e.g. 'exported_seq' or 'peer:<node>'), 0 if never set."""
+        conn = self._get_conn()
+        try:
+            row = conn.cursor().execute("SELECT value FROM sync_state WHERE key = ?", (name,)).fetchone()
+            return row[0] if row else 0
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def set_sync_cursor(self, name, value):
+        conn = self._get_conn()
+        try:
+            conn.cursor().execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (name, value))
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error saving sync position: {e}")
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def get_journal(self, after_seq):
+        """
+        Returns (last_seq, changes) for the journal rows written on this machine after
+        `after_seq`, where changes are (clock, node, entity, key, field, value) in order.
+        Rows keep the node they were stamped with, so edits made before the node id changed
+        are still sent and still win or lose the same way everywhere. Only the newest version
+        of each field is kept, so a title edited ten times since the last sync is sent once.
+        """
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            last_seq = cursor.execute("SELECT MAX(seq) FROM change_log WHERE seq > ?", (after_seq,)).fetchone()[0]
+            if last_seq is None:
+                return after_seq, []
+            changes = cursor.execute("""
+                SELECT c.clock, c.node, c.entity, c.key, c.field, c.value
+                FROM change_log c
+                WHERE c.seq > ? AND c.origin_local = 1
+                  AND NOT EXISTS (
+                      SELECT 1 FROM change_log n
+                      WHERE n.entity = c.entity AND n.key = c.key AND n.field = c.field
+                        AND (n.clock > c.clock OR (n.clock = c.clock AND n.node > c.node))
+                  )
+                ORDER BY c.seq
+            """, (after_seq,)).fetchall()
+            return last_seq, [tuple(row) for row in changes]
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def apply_changes(self, peer, changes, peer_seq):
+        """
+        Merges another machine's (clock, node, entity, key, field, value) changes in one
+        transaction. A change wins when its (clock, node) is newer than the newest version
+        of that field seen so far; ties on the clock go to the larger node id, so every
+        machine picks the same winner whatever order files arrive in. Each link touched is
+        then rebuilt from change_log, so the library only ever depends on which changes
+        have been seen, not on the order they arrived in. Records `peer_seq` as the position
+        reached in `peer`'s files and returns the number of changes applied, or None if
+        nothing could be written.
+        """
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE sync_state SET value = 1 WHERE key = 'replaying'")
+            general_id = cursor.execute("SELECT id FROM groups WHERE name = 'General'").fetchone()[0]
+            applied = 0
+            max_clock = 0
+            touched_urls = set()
+            for clock, node, entity, key, field, value in changes:
+                max_clock = max(max_clock, clock)
+                current = cursor.execute("""
+                    SELECT clock, node FROM change_log WHERE entity = ? AND key = ? AND field = ?
+                    ORDER BY clock DESC, node DESC LIMIT 1
+                """, (entity, key, field)).fetchone()
+                if current and tuple(current) >= (clock, node):
+                    continue
+                cursor.execute("""
+                    INSERT INTO change_log (clock, node, entity, key, field, value, origin_local)
+                    VALUES (?, ?, ?, ?, ?, ?, 0)
+                """, (clock, node, entity, key, field, value))
+                if entity == "group":
+                    self._apply_group(cursor, general_id, key, value)
+                else:
+                    touched_urls.add(key)
+                applied += 1
+            for url in sorted(touched_urls):
+                self._rebuild_url(cursor, general_id, url)
+            # Lamport clock: our next edit must come after everything we have seen
+            cursor.execute("UPDATE sync_state SET value = MAX(value, ?) WHERE key = 'clock'", (max_clock,))
+            cursor.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (f"peer:{peer}", peer_seq))
+            cursor.execute("UPDATE sync_state SET value = 0 WHERE key = 'replaying'")
+            conn.commit()
+            return applied
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error applying changes from {peer}: {e}")
+            return None
+        finally:
+            if not self.memory_conn:
+                conn.close()
+
+    def _apply_group(self, cursor, general_id, name, present):
+        """
+        Creates or deletes a group. Links whose newest 'group' change names a missing group
+        are shown in General; trg_groups_adopt_links moves them back if it is re-created.
+        """
+        if present:
+            cursor.execute("INSERT OR IGNORE INTO groups (name) VALUES (?)", (name,))
+        elif name != "General":
+            cursor.execute("UPDATE urls SET group_id = ? WHERE group_id = (SELECT id FROM groups WHERE name = ?)",
+                           (general_id, name))
+            cursor.execute("DELETE FROM groups WHERE name = ?", (name,))
+
+    def _rebuild_url(self, cursor, general_id, url):
+        """
+        Writes one link's row and tags from the newest change_log value of each field.
+        Changes older than the newest 'present' change belong to an earlier life of the
+        link (before it was deleted and added again), so they are ignored, just as adding
+        a link locally starts it without its old tags.
+        """
+        rows = cursor.execute("""
+            SELECT clock, node, field, value FROM change_log WHERE entity = 'url' AND key = ?
+            ORDER BY clock, node
+        """, (url,)).fetchall()
+        born = max(((clock, node, value) for clock, node, field, value in rows if field == "present"), default=None)
+        if not born or not born[2]:
+            cursor.execute("DELETE FROM url_history WHERE url_id = (SELECT id FROM urls WHERE url = ?)", (url,))
+            cursor.execute("DELETE FROM urls WHERE url = ?", (url,))
+            return
+        fields = {field: value for clock, node, field, value in rows if (clock, node) >= born[:2]}
+        title = fields.get("title", urlparse(url).netloc or url)
+        group_id = cursor.execute("SELECT COALESCE((SELECT id FROM groups WHERE name = ?), ?)",
+                                  (fields.get("group"), general_id)).fetchone()[0]
+        cursor.execute("UPDATE urls SET title = ?, group_id = ? WHERE url = ?", (title, group_id, url))
+        if not cursor.rowcount:
+            cursor.execute("INSERT INTO urls (title, url, group_id, last_opened) VALUES (?, ?, ?, ?)",
+                           (title, url, group_id, datetime.now().isoformat()))
+        tags_json = json.dumps([field[4:] for field, value in fields.items() if field.startswith("tag:") and value])
+        url_id = cursor.execute("SELECT id FROM urls WHERE url = ?", (url,)).fetchone()[0]
+        cursor.execute("""
+            DELETE FROM url_tags
+            WHERE url_id = ? AND tag_id NOT IN (SELECT id FROM tags WHERE name IN (SELECT value FROM json_each(?)))
+        """, (url_id, tags_json))
+        cursor.execute("INSERT OR IGNORE INTO tags (name) SELECT value FROM json_each(?)", (tags_json,))
+        cursor.execute("""
+            INSERT OR IGNORE INTO url_tags (tag_id, url_id)
+            SELECT id, ? FROM tags WHERE name IN (SELECT value FROM json_each(?))
+        """, (url_id, tags_json))
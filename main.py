@@ -1,3 +1,7 @@
+import time
+# Taken before the heavy imports below so startup timing covers them
+START_TIME = time.perf_counter()
+
 import config
 from ui.app import UrlManagerApp
 
@@ -7,5 +11,5 @@ if __name__ == "__main__":
     config.setup_theme()
     
     # Launch Application
-    app = UrlManagerApp()
+    app = UrlManagerApp(start_time=START_TIME)
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,23 @@
+import unittest
+import threading
+from http.server import HTTPServer
+
+
+class LocalServerTestCase(unittest.TestCase):
+    """
+    Base for tests that talk HTTP: serves `handler` (a BaseHTTPRequestHandler subclass)
+    on a free local port for the whole class, so the tests never touch the real network.
+    The server's address is available as `self.base`.
+    """
+    handler = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(("127.0.0.1", 0), cls.handler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
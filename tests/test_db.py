@@ -1,11 +1,13 @@
 import unittest
 import sys
 import os
+import random
 import sqlite3
+from datetime import datetime
 
 # Ensure we can import the database module from the parent directory
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database.db_manager import DatabaseManager
+from database.db_manager import DatabaseManager, HISTORY_CHAPTER, HISTORY_STATUS, DAY_SECONDS
 
 class TestDatabase(unittest.TestCase):
     
@@ -280,5 +282,736 @@ class TestDatabase(unittest.TestCase):
         groups = self.db.get_groups()
         self.assertEqual(groups[0], "General")
 
+    # --- LINK HEALTH TESTS ---
+
+    def test_update_link_status_marks_dead_links(self):
+        """
+        Verifies that links recorded as unreachable (0) or with an error status
+        show up in the dead links view, while healthy links do not.
+        """
+        self.db.add_url("https://alive.com", "General")
+        self.db.add_url("https://gone.com", "General")
+        self.db.add_url("https://offline.com", "General")
+        ids = {row[2]: row[0] for row in self.db.get_urls_by_group("General")}
+
+        self.db.update_link_status([
+            (ids["https://alive.com"], 200, None),
+            (ids["https://gone.com"], 404, None),
+            (ids["https://offline.com"], 0, None),
+        ])
+
+        dead = {row[2] for row in self.db.get_dead_links()}
+        self.assertEqual(dead, {"https://gone.com", "https://offline.com"})
+
+    def test_dead_links_can_be_filtered_by_text(self):
+        """
+        Verifies the dead links filter matches against the title or URL.
+        """
+        self.db.add_url("https://gone.com", "General")
+        self.db.add_url("https://missing.org", "General")
+        self.db.update_link_status([(row[0], 404, None) for row in self.db.get_urls_by_group("General")])
+
+        filtered = self.db.get_dead_links("missing")
+        self.assertEqual(len(filtered), 1)
+        self.assertEqual(filtered[0][2], "https://missing.org")
+
+    def test_unchecked_links_are_not_reported_dead(self):
+        """
+        Verifies that links which were never checked are not shown as dead.
+        """
+        self.db.add_url("https://never-checked.com", "General")
+        self.assertEqual(self.db.get_dead_links(), [])
+
+    def test_rewrite_moved_urls_updates_url(self):
+        """
+        Verifies that a permanently moved link is rewritten to its new location.
+        """
+        self.db.add_url("https://old-domain.com/novel", "General")
+        url_id = self.db.get_urls_by_group("General")[0][0]
+
+        rewritten = self.db.rewrite_moved_urls([(url_id, "https://new-domain.com/novel")])
+
+        self.assertEqual(rewritten, 1)
+        self.assertEqual(self.db.get_urls_by_group("General")[0][2], "https://new-domain.com/novel")
+
+    def test_rewrite_moved_urls_respects_unique_constraint(self):
+        """
+        Verifies that rewriting a link to a URL that is already stored is skipped
+        instead of failing, and that the rest of the batch is still applied.
+        """
+        self.db.add_url("https://old.com/a", "General")
+        self.db.add_url("https://new.com/a", "General")
+        self.db.add_url("https://old.com/b", "General")
+        ids = {row[2]: row[0] for row in self.db.get_urls_by_group("General")}
+
+        rewritten = self.db.rewrite_moved_urls([
+            (ids["https://old.com/a"], "https://new.com/a"),  # Conflict
+            (ids["https://old.com/b"], "https://new.com/b"),
+        ])
+
+        self.assertEqual(rewritten, 1)
+        urls = {row[2] for row in self.db.get_urls_by_group("General")}
+        self.assertEqual(urls, {"https://old.com/a", "https://new.com/a", "https://new.com/b"})
+
+    def test_init_db_adds_link_health_columns_to_old_schema(self):
+        """
+        Verifies that a database created before the link health feature is
+        upgraded in place when opened.
+        """
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE groups (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL)")
+        conn.execute("""
+            CREATE TABLE urls (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, url TEXT NOT NULL UNIQUE,
+                               group_id INTEGER, favicon_blob BLOB, last_opened DATETIME)
+        """)
+        old_db = DatabaseManager.__new__(DatabaseManager)
+        old_db.db_name = ":memory:"
+        old_db.memory_conn = conn
+        old_db.init_db()
+
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(urls)")}
+        self.assertTrue({"status_code", "final_url", "last_checked", "latest_chapter", "has_update"} <= columns)
+        conn.close()
+
+    # --- CHAPTER TRACKING TESTS ---
+
+    def _add_series(self, url="https://novel.com/series"):
+        self.db.add_url(url, "General")
+        return [row for row in self.db.get_urls_by_group("General") if row[2] == url][0][0]
+
+    def test_first_chapter_result_is_not_marked_new(self):
+        """
+        Verifies that the first chapter found for a series only sets the baseline,
+        so a freshly tracked series is not shown as updated.
+        """
+        url_id = self._add_series()
+        self.db.save_chapter_results([(url_id, 411.0, "Chapter 411")])
+
+        row = self.db.get_urls_by_group("General")[0]
+        self.assertEqual(row[4], 411.0)
+        self.assertEqual(row[5], 0)
+
+    def test_newer_chapter_is_marked_new(self):
+        """
+        Verifies that a chapter past the one already seen raises the update flag.
+        """
+        url_id = self._add_series()
+        self.db.save_chapter_results([(url_id, 411.0, "Chapter 411")])
+        self.db.save_chapter_results([(url_id, 412.0, "Chapter 412")])
+
+        row = self.db.get_urls_by_group("General")[0]
+        self.assertEqual(row[4], 412.0)
+        self.assertEqual(row[5], 1)
+
+    def test_opening_url_clears_new_flag(self):
+        """
+        Verifies that opening an updated series clears the flag and makes the
+        latest chapter the new baseline.
+        """
+        url_id = self._add_series()
+        self.db.save_chapter_results([(url_id, 411.0, None)])
+        self.db.save_chapter_results([(url_id, 412.0, None)])
+        self.db.record_opens([(url_id, datetime.now().isoformat(), 412.0)])
+        self.db.save_chapter_results([(url_id, 412.0, None)])
+
+        self.assertEqual(self.db.get_urls_by_group("General")[0][5], 0)
+
+    def test_chapter_saved_after_click_stays_new(self):
+        """
+        Verifies that the open only marks the chapter shown on the card as seen: a newer
+        chapter saved between the click and the batched write keeps its 'new' flag.
+        """
+        url_id = self._add_series()
+        self.db.save_chapter_results([(url_id, 411.0, None)])
+        self.db.save_chapter_results([(url_id, 412.0, None)])
+        clicked_at = datetime.now().isoformat()
+        self.db.save_chapter_results([(url_id, 413.0, None)])
+        self.db.record_opens([(url_id, clicked_at, 412.0)])
+
+        seen, has_update = self.db.memory_conn.execute("SELECT seen_chapter, has_update FROM urls").fetchone()
+        self.assertEqual(seen, 412.0)
+        self.assertEqual(has_update, 1)
+
+    def test_unchanged_chapter_keeps_new_flag_until_seen(self):
+        """
+        Verifies that re-checking without a newer chapter does not clear an unseen update.
+        """
+        url_id = self._add_series()
+        self.db.save_chapter_results([(url_id, 1.0, None)])
+        self.db.save_chapter_results([(url_id, 2.0, None)])
+        self.db.save_chapter_results([(url_id, 2.0, None)])
+
+        self.assertEqual(self.db.get_urls_by_group("General")[0][5], 1)
+
+    # --- FEED TESTS ---
+
+    def test_discovered_feeds_are_cached_per_domain(self):
+        """
+        Verifies that discovered feeds (and sites known to have none) are returned,
+        so discovery does not run again on the next check.
+        """
+        self.db.save_discovered_feeds([("site.com", "https://site.com/rss"), ("nofeed.com", None)])
+        feeds = self.db.get_feeds()
+        self.assertEqual(feeds["site.com"], ("https://site.com/rss", None, None, None))
+        self.assertIn("nofeed.com", feeds)
+
+    def test_sites_without_feed_are_retried_after_retry_period(self):
+        """
+        Verifies that a site with no feed is offered for discovery again once the
+        retry period is over, while real feeds are kept.
+        """
+        self.db.save_discovered_feeds([("site.com", "https://site.com/rss"), ("nofeed.com", None)])
+        feeds = self.db.get_feeds(retry_after_days=-1)
+        self.assertIn("site.com", feeds)
+        self.assertNotIn("nofeed.com", feeds)
+
+    def test_update_feed_state_stores_validators(self):
+        """
+        Verifies that ETag, Last-Modified and the newest entry id are kept for the next poll.
+        """
+        self.db.save_discovered_feeds([("site.com", "https://site.com/rss")])
+        self.db.update_feed_state([("site.com", '"v2"', "Mon, 01 Jan 2024 00:00:00 GMT", "c413")])
+        self.assertEqual(self.db.get_feeds()["site.com"],
+                         ("https://site.com/rss", '"v2"', "Mon, 01 Jan 2024 00:00:00 GMT", "c413"))
+
+    def test_feed_matched_flag_is_stored_and_reset_on_move(self):
+        """
+        Verifies that a URL marked as covered by its feed reports it in the chapter
+        check rows, and that rewriting the URL clears it again.
+        """
+        url_id = self._add_series()
+        self.db.mark_feed_matched([url_id])
+        self.assertEqual(self.db.get_chapter_check_rows(), [(url_id, "https://novel.com/series", None, 1)])
+
+        self.db.rewrite_moved_urls([(url_id, "https://novel.com/new-series")])
+        self.assertEqual(self.db.get_chapter_check_rows()[0][3], 0)
+
+    # --- UPDATE HISTORY TESTS ---
+
+    NOW = 1_700_000_000
+
+    def test_chapter_changes_are_appended_to_history(self):
+        """
+        Verifies that each new chapter is logged once, and that re-checking an
+        unchanged chapter does not add duplicate events.
+        """
+        url_id = self._add_series()
+        self.db.save_chapter_results([(url_id, 1.0, "Chapter 1")])
+        self.db.save_chapter_results([(url_id, 1.0, "Chapter 1")])
+        self.db.save_chapter_results([(url_id, 2.0, "Chapter 2")])
+
+        changes = self.db.get_changes_since(url_id, since=0)
+        self.assertEqual([(c[1], c[2], c[3]) for c in changes],
+                         [(HISTORY_CHAPTER, 1.0, "Chapter 1"), (HISTORY_CHAPTER, 2.0, "Chapter 2")])
+
+    def test_status_changes_are_appended_to_history(self):
+        """
+        Verifies that the link checker logs a status only when it changes.
+        """
+        url_id = self._add_series()
+        self.db.update_link_status([(url_id, 200, None)])
+        self.db.update_link_status([(url_id, 200, None)])
+        self.db.update_link_status([(url_id, 404, None)])
+
+        statuses = [c[2] for c in self.db.get_changes_since(url_id, since=0) if c[1] == HISTORY_STATUS]
+        self.assertEqual(statuses, [200, 404])
+
+    def test_long_snapshots_are_compressed_and_restored(self):
+        """
+        Verifies that long snapshot text is stored zlib-compressed (as a BLOB smaller
+        than the text) and comes back unchanged.
+        """
+        url_id = self._add_series()
+        text = "Chapter 12: " + "a long and repetitive chapter title " * 20
+        self.db.record_history([(url_id, HISTORY_CHAPTER, 12.0, text, None)])
+
+        stored = self.db.memory_conn.execute("SELECT snapshot FROM url_history").fetchone()[0]
+        self.assertIsInstance(stored, bytes)
+        self.assertLess(len(stored), len(text))
+        self.assertEqual(self.db.get_changes_since(url_id, since=0)[0][3], text)
+
+    def test_changes_since_defaults_to_last_opened(self):
+        """
+        Verifies that "what changed since I last opened this" only returns events
+        newer than the URL's last_opened time.
+        """
+        url_id = self._add_series()
+        opened = self.db.memory_conn.execute("SELECT last_opened FROM urls").fetchone()[0]
+        opened_ts = int(datetime.fromisoformat(opened).timestamp())
+        self.db.record_history([
+            (url_id, HISTORY_CHAPTER, 1.0, None, opened_ts - 100),
+            (url_id, HISTORY_CHAPTER, 2.0, None, opened_ts + 100),
+        ])
+        self.assertEqual([c[2] for c in self.db.get_changes_since(url_id)], [2.0])
+
+    def test_changes_since_query_uses_index(self):
+        """
+        Verifies the history lookup is index-backed rather than a table scan.
+        """
+        plan = " ".join(str(row[3]) for row in self.db.memory_conn.execute("""
+            EXPLAIN QUERY PLAN SELECT ts, kind, value, snapshot FROM url_history
+            WHERE url_id = 1 AND ts > 0 ORDER BY ts
+        """))
+        self.assertIn("idx_history_url_ts", plan)
+
+    def test_compaction_thins_history_by_age(self):
+        """
+        Verifies the retention policy: recent events are all kept, events older than
+        30 days are thinned to one per day, and older than 180 days to one per week.
+        """
+        url_id = self._add_series()
+        events = []
+        # 4 events a day, for 3 recent days, 3 mid-age days and 14 old days (2 weeks)
+        for age_days in [1, 2, 3] + [40, 41, 42] + list(range(200, 214)):
+            day_start = self.NOW - age_days * DAY_SECONDS
+            day_start -= day_start % DAY_SECONDS
+            for hour in range(4):
+                events.append((url_id, HISTORY_CHAPTER, float(age_days), None, day_start + hour * 3600))
+        self.db.record_history(events)
+
+        self.db.compact_history(now=self.NOW)
+
+        remaining = self.db.get_changes_since(url_id, since=0)
+        recent = [c for c in remaining if c[0] > self.NOW - 30 * DAY_SECONDS]
+        mid = [c for c in remaining if self.NOW - 180 * DAY_SECONDS <= c[0] <= self.NOW - 30 * DAY_SECONDS]
+        old = [c for c in remaining if c[0] < self.NOW - 180 * DAY_SECONDS]
+        self.assertEqual(len(recent), 12)
+        self.assertEqual(len(mid), 3)
+        self.assertLessEqual(len(old), 3)  # 14 days touch at most 3 week buckets
+        self.assertGreaterEqual(len(old), 2)
+
+    def test_compaction_keeps_kinds_separate(self):
+        """
+        Verifies that thinning keeps the last chapter AND the last status event of a day,
+        instead of letting one kind replace the other.
+        """
+        url_id = self._add_series()
+        old_day = self.NOW - 60 * DAY_SECONDS
+        old_day -= old_day % DAY_SECONDS
+        self.db.record_history([
+            (url_id, HISTORY_CHAPTER, 5.0, None, old_day + 10),
+            (url_id, HISTORY_STATUS, 404, None, old_day + 20),
+            (url_id, HISTORY_CHAPTER, 6.0, None, old_day + 30),
+        ])
+        self.db.compact_history(now=self.NOW)
+
+        remaining = sorted((c[1], c[2]) for c in self.db.get_changes_since(url_id, since=0))
+        self.assertEqual(remaining, [(HISTORY_CHAPTER, 6.0), (HISTORY_STATUS, 404)])
+
+    def test_compaction_runs_in_small_batches(self):
+        """
+        Verifies the incremental job: each batch covers at most batch_size URLs and
+        the last batch reports completion with None.
+        """
+        for i in range(5):
+            self.db.add_url(f"https://site{i}.com", "General")
+        ids = [row[0] for row in self.db.get_urls_by_group("General")]
+        self.db.record_history([(u, HISTORY_CHAPTER, 1.0, None, None) for u in ids])
+
+        after, _ = self.db.compact_history_batch(0, batch_size=2, now=self.NOW)
+        self.assertEqual(after, sorted(ids)[1])
+        after, _ = self.db.compact_history_batch(after, batch_size=2, now=self.NOW)
+        after, _ = self.db.compact_history_batch(after, batch_size=2, now=self.NOW)
+        self.assertEqual(self.db.compact_history_batch(after, batch_size=2, now=self.NOW), (None, 0))
+
+    def test_deleting_url_removes_its_history(self):
+        """
+        Verifies that history rows do not outlive their URL.
+        """
+        url_id = self._add_series()
+        self.db.record_history([(url_id, HISTORY_CHAPTER, 1.0, None, None)])
+        self.db.delete_url(url_id)
+        self.assertEqual(self.db.get_changes_since(url_id, since=0), [])
+
+    # --- OPEN TRACKING TESTS ---
+
+    def _plan(self, query, params=()):
+        return " ".join(str(row[3]) for row in self.db.memory_conn.execute("EXPLAIN QUERY PLAN " + query, params))
+
+    def test_record_opens_counts_batched_events(self):
+        """
+        Verifies that a batch with repeated opens of the same link adds them all to
+        open_count and keeps the newest time as last_opened.
+        """
+        url_id = self._add_series()
+        self.db.record_opens([
+            (url_id, "2030-01-01T10:00:00", None),
+            (url_id, "2030-01-03T10:00:00", None),
+            (url_id, "2030-01-02T10:00:00", None),
+        ])
+        count, last = self.db.memory_conn.execute("SELECT open_count, last_opened FROM urls").fetchone()
+        self.assertEqual(count, 3)
+        self.assertEqual(last, "2030-01-03T10:00:00")
+
+    def test_record_opens_never_moves_last_opened_backwards(self):
+        """
+        Verifies that a late batch carrying older events does not overwrite a newer last_opened.
+        """
+        url_id = self._add_series()
+        self.db.record_opens([(url_id, "2030-01-05T00:00:00", None)])
+        self.db.record_opens([(url_id, "2030-01-01T00:00:00", None)])
+        last = self.db.memory_conn.execute("SELECT last_opened FROM urls").fetchone()[0]
+        self.assertEqual(last, "2030-01-05T00:00:00")
+
+    def test_sort_by_recently_and_most_opened(self):
+        """
+        Verifies the 'recent' and 'popular' sort orders of get_urls_by_group.
+        """
+        a = self._add_series("https://a.com")
+        b = self._add_series("https://b.com")
+        c = self._add_series("https://c.com")
+        self.db.record_opens([(a, "2030-01-01T00:00:00", None)] * 3 + [(b, "2030-01-03T00:00:00", None)] +
+                             [(c, "2030-01-02T00:00:00", None)] * 2)
+
+        recent = [row[0] for row in self.db.get_urls_by_group("General", "recent")]
+        popular = [row[0] for row in self.db.get_urls_by_group("All URLs", "popular")]
+        self.assertEqual(recent, [b, c, a])
+        self.assertEqual(popular, [a, c, b])
+
+    def test_sorted_views_are_index_backed(self):
+        """
+        Verifies that sorted views read rows in index order instead of sorting
+        the whole group in a temporary B-tree.
+        """
+        group_query = """
+            SELECT u.id FROM urls u JOIN groups g ON u.group_id = g.id WHERE g.name = ?
+        """
+        for order in ("ORDER BY u.last_opened DESC", "ORDER BY u.open_count DESC, u.last_opened DESC"):
+            self.assertNotIn("TEMP B-TREE", self._plan(group_query + order, ("General",)))
+            self.assertNotIn("TEMP B-TREE", self._plan("SELECT u.id FROM urls u " + order))
+
+
+class TestGroupCounters(unittest.TestCase):
+
+    def setUp(self):
+        self.db = DatabaseManager(":memory:")
+        self.conn = self.db.memory_conn
+
+    def tearDown(self):
+        if self.db.memory_conn:
+            self.db.memory_conn.close()
+
+    def recount(self):
+        """The slow, always-correct answer the counters must match."""
+        return [tuple(row) for row in self.conn.execute("""
+            SELECT g.name, COUNT(u.id), COALESCE(SUM(u.has_update != 0), 0)
+            FROM groups g LEFT JOIN urls u ON u.group_id = g.id
+            GROUP BY g.id ORDER BY g.id
+        """)]
+
+    def test_counts_follow_adds_and_deletes(self):
+        """
+        Verifies the simple case: adding links raises the group total and deleting
+        one lowers it again.
+        """
+        self.db.add_group("Reading")
+        self.db.add_url("https://a.com", "Reading")
+        self.db.add_url("https://b.com", "Reading")
+        self.assertIn(("Reading", 2, 0), self.db.get_groups(with_counts=True))
+
+        self.db.delete_url(self.db.get_urls_by_group("Reading")[0][0])
+        self.assertIn(("Reading", 1, 0), self.db.get_groups(with_counts=True))
+
+    def test_unread_counts_follow_chapter_updates_and_opens(self):
+        """
+        Verifies the unread badge: a new chapter raises it, opening the link clears it.
+        """
+        self.db.add_url("https://a.com", "General")
+        url_id = self.db.get_urls_by_group("General")[0][0]
+        self.db.save_chapter_results([(url_id, 1.0, None)])
+        self.db.save_chapter_results([(url_id, 2.0, None)])
+        self.assertEqual(self.db.get_groups(with_counts=True)[0], ("General", 1, 1))
+
+        self.db.record_opens([(url_id, datetime.now().isoformat(), 2.0)])
+        self.assertEqual(self.db.get_groups(with_counts=True)[0], ("General", 1, 0))
+
+    def test_get_groups_without_counts_still_returns_names(self):
+        """
+        Verifies the plain name list used elsewhere is unchanged.
+        """
+        self.assertEqual(self.db.get_groups(), ["General"])
+
+    def test_counters_are_backfilled_for_existing_library(self):
+        """
+        Verifies that opening a library created before the counters existed
+        fills them with a one-time recount.
+        """
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE groups (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL)")
+        conn.execute("""
+            CREATE TABLE urls (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, url TEXT NOT NULL UNIQUE,
+                               group_id INTEGER, favicon_blob BLOB, last_opened DATETIME)
+        """)
+        conn.execute("INSERT INTO groups (name) VALUES ('Old')")
+        conn.executemany("INSERT INTO urls (url, group_id) VALUES (?, 1)", [("a",), ("b",), ("c",)])
+        conn.commit()
+        old_db = DatabaseManager.__new__(DatabaseManager)
+        old_db.db_name = ":memory:"
+        old_db.memory_conn = conn
+        old_db.store_snapshots = True
+        old_db.init_db()
+
+        self.assertIn(("Old", 3, 0), old_db.get_groups(with_counts=True))
+        conn.close()
+
+    def test_counters_match_recount_after_random_operations(self):
+        """
+        Verifies the triggers under random sequences of add, bulk add, delete, move,
+        unread-flag changes and group deletion: after every step the counters must
+        equal a full recount.
+        """
+        rng = random.Random(1234)
+        groups = ["General", "Reading", "Manga", "Done"]
+        for g in groups[1:]:
+            self.db.add_group(g)
+        next_url = 0
+
+        for step in range(400):
+            ids = [row[0] for row in self.conn.execute("SELECT id FROM urls")]
+            op = rng.choice(["add", "bulk", "delete", "move", "flag", "flag", "delete_group"])
+            if op == "add" or not ids:
+                self.db.add_url(f"https://site{next_url}.com", rng.choice(groups))
+                next_url += 1
+            elif op == "bulk":
+                batch = [(f"T{i}", f"https://site{next_url + i}.com", rng.choice(groups + ["New"]))
+                         for i in range(rng.randint(1, 5))]
+                next_url += len(batch)
+                self.db.bulk_add_urls(batch)
+                if "New" not in groups:
+                    groups.append("New")
+            elif op == "delete":
+                self.db.delete_url(rng.choice(ids))
+            elif op == "move":
+                target = self.conn.execute("SELECT id FROM groups ORDER BY RANDOM() LIMIT 1").fetchone()[0]
+                self.conn.execute("UPDATE urls SET group_id = ? WHERE id = ?", (target, rng.choice(ids)))
+                self.conn.commit()
+            elif op == "flag":
+                self.conn.execute("UPDATE urls SET has_update = ? WHERE id = ?", (rng.randint(0, 2), rng.choice(ids)))
+                self.conn.commit()
+            elif op == "delete_group" and len(groups) > 2 and rng.random() < 0.1:
+                victim = rng.choice(groups[1:])
+                self.db.delete_group(victim)
+                groups.remove(victim)
+
+            self.assertEqual(self.db.get_groups(with_counts=True), self.recount(), f"Mismatch after step {step} ({op})")
+
+
+class TestBulkOperations(unittest.TestCase):
+
+    def setUp(self):
+        self.db = DatabaseManager(":memory:")
+        self.conn = self.db.memory_conn
+        self.db.add_group("Reading")
+        self.db.bulk_add_urls([(f"T{i}", f"https://site{i}.com", "General") for i in range(5)])
+        self.ids = [row[0] for row in self.conn.execute("SELECT id FROM urls ORDER BY id")]
+
+    def tearDown(self):
+        if self.db.memory_conn:
+            self.db.memory_conn.close()
+
+    def test_delete_urls_removes_rows_and_history(self):
+        """
+        Verifies that a bulk delete removes exactly the selected links, their history,
+        and lowers the group counter in the same step.
+        """
+        self.db.update_link_status([(self.ids[0], 404, None), (self.ids[1], 404, None)])
+        self.assertEqual(self.db.delete_urls(self.ids[:2]), 2)
+
+        remaining = [row[0] for row in self.db.get_urls_by_group("General")]
+        self.assertEqual(sorted(remaining), self.ids[2:])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM url_history").fetchone()[0], 0)
+        self.assertIn(("General", 3, 0), self.db.get_groups(with_counts=True))
+
+    def test_move_urls_updates_both_group_counters(self):
+        """
+        Verifies that moving links changes their group and both sidebar counters.
+        """
+        self.assertEqual(self.db.move_urls(self.ids[:3], "Reading"), 3)
+        self.assertEqual(len(self.db.get_urls_by_group("Reading")), 3)
+        counts = self.db.get_groups(with_counts=True)
+        self.assertIn(("General", 2, 0), counts)
+        self.assertIn(("Reading", 3, 0), counts)
+
+    def test_move_to_missing_group_changes_nothing(self):
+        """
+        Verifies that moving to a group that does not exist is a no-op rather than
+        orphaning the links.
+        """
+        self.assertEqual(self.db.move_urls(self.ids, "Nowhere"), 0)
+        self.assertEqual(len(self.db.get_urls_by_group("General")), 5)
+
+    def test_retitle_urls_applies_each_title(self):
+        """
+        Verifies that retitle_urls sets a per-link title and leaves other links alone.
+        """
+        self.db.retitle_urls({self.ids[0]: "First", self.ids[1]: "Second 🚀"})
+        titles = dict(self.conn.execute("SELECT id, title FROM urls").fetchall())
+        self.assertEqual(titles[self.ids[0]], "First")
+        self.assertEqual(titles[self.ids[1]], "Second 🚀")
+        self.assertEqual(titles[self.ids[2]], "T2")
+
+    def test_bulk_delete_is_one_transaction_of_set_based_statements(self):
+        """
+        Verifies the bulk path behind the 5,000-link goal: deleting a large selection
+        runs two set-based statements (history, then links) inside a single
+        transaction, however many links are selected. The trace also reports trigger
+        steps under their parent statement, so distinct statements are counted.
+        """
+        self.db.bulk_add_urls([(f"B{i}", f"https://bulk{i}.com", "Reading") for i in range(500)])
+        ids = [row[0] for row in self.db.get_urls_by_group("Reading")]
+
+        traced = []
+        self.conn.set_trace_callback(traced.append)
+        self.assertEqual(self.db.delete_urls(ids), 500)
+        self.conn.set_trace_callback(None)
+
+        self.assertEqual([sql.strip() for sql in traced if sql.strip() in ("BEGIN", "COMMIT")], ["BEGIN", "COMMIT"])
+        self.assertEqual(len({sql for sql in traced if sql.startswith("DELETE")}), 2)
+        self.assertIn(("Reading", 0, 0), self.db.get_groups(with_counts=True))
+
+class TestTags(unittest.TestCase):
+
+    def setUp(self):
+        self.db = DatabaseManager(":memory:")
+        self.conn = self.db.memory_conn
+        self.db.add_group("Reading")
+        self.db.bulk_add_urls([
+            ("A", "https://a.com", "General", ("manga", "korean")),
+            ("B", "https://b.com", "General", ("manga",)),
+            ("C", "https://c.com", "Reading", ("manga", "completed")),
+            ("D", "https://d.com", "Reading", ("novel", "korean")),
+            ("E", "https://e.com", "Reading"),
+        ])
+        self.ids = {row[1]: row[0] for row in self.conn.execute("SELECT id, title FROM urls")}
+
+    def tearDown(self):
+        if self.db.memory_conn:
+            self.db.memory_conn.close()
+
+    def titles(self, rows):
+        return sorted(row[1] for row in rows)
+
+    def test_bulk_import_assigns_folder_tags(self):
+        """
+        Verifies that the optional 4th element of an import tuple becomes tags, and
+        that plain 3-tuples still import untagged.
+        """
+        self.assertEqual(self.db.get_url_tags(self.ids["A"]), ["korean", "manga"])
+        self.assertEqual(self.db.get_url_tags(self.ids["E"]), [])
+        self.assertEqual(self.db.get_tags(with_counts=True),
+                         [("completed", 1), ("korean", 2), ("manga", 3), ("novel", 1)])
+
+    def test_filter_all_any_and_not(self):
+        """
+        Verifies AND, OR and NOT filters and their combination.
+        """
+        self.assertEqual(self.titles(self.db.get_urls_by_tags(all_of=["manga", "korean"])), ["A"])
+        self.assertEqual(self.titles(self.db.get_urls_by_tags(any_of=["completed", "novel"])), ["C", "D"])
+        self.assertEqual(self.titles(self.db.get_urls_by_tags(none_of=["manga"])), ["D", "E"])
+        self.assertEqual(self.titles(self.db.get_urls_by_tags(all_of=["manga"], none_of=["completed"],
+                                                              any_of=["korean", "novel"])), ["A"])
+
+    def test_filter_combines_with_group(self):
+        """
+        Verifies that a tag filter can be limited to one group, and that "All URLs"
+        means no group limit.
+        """
+        self.assertEqual(self.titles(self.db.get_urls_by_tags(all_of=["manga"], group_name="Reading")), ["C"])
+        self.assertEqual(self.titles(self.db.get_urls_by_tags(all_of=["korean"], group_name="All URLs")), ["A", "D"])
+
+    def test_unknown_tags(self):
+        """
+        Verifies that requiring an unknown tag matches nothing, while excluding one is ignored.
+        """
+        self.assertEqual(self.db.get_urls_by_tags(all_of=["manga", "missing"]), [])
+        self.assertEqual(self.db.get_urls_by_tags(any_of=["missing"]), [])
+        self.assertEqual(len(self.db.get_urls_by_tags(none_of=["missing"])), 5)
+
+    def test_tag_and_untag_urls(self):
+        """
+        Verifies adding tags to a selection (creating new tags) and removing them again,
+        with counts following along.
+        """
+        self.assertEqual(self.db.tag_urls([self.ids["D"], self.ids["E"]], ["webtoon", " manga "]), 4)
+        self.assertIn(("webtoon", 2), self.db.get_tags(with_counts=True))
+        self.assertIn(("manga", 5), self.db.get_tags(with_counts=True))
+
+        self.assertEqual(self.db.untag_urls([self.ids["E"]], ["webtoon", "manga"]), 2)
+        self.assertEqual(self.db.get_url_tags(self.ids["E"]), [])
+
+    def test_deleting_links_and_tags_cleans_junction(self):
+        """
+        Verifies that deleting a link, a group or a tag leaves no stale url_tags rows
+        and keeps url_count correct.
+        """
+        self.db.delete_url(self.ids["A"])
+        self.db.delete_group("Reading")
+        self.assertEqual(self.db.get_tags(with_counts=True),
+                         [("completed", 0), ("korean", 0), ("manga", 1), ("novel", 0)])
+
+        self.db.delete_tag("manga")
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM url_tags").fetchone()[0], 0)
+        self.assertNotIn("manga", self.db.get_tags())
+
+    def test_intersection_starts_from_smallest_tag(self):
+        """
+        Verifies the query plan of an AND filter: the scan runs over the rarest tag and
+        the other tags are probed by primary key.
+        """
+        captured = []
+        self.conn.set_trace_callback(captured.append)
+        self.db.get_urls_by_tags(all_of=["manga", "completed"])
+        self.conn.set_trace_callback(None)
+        query = captured[-1]
+
+        plan = [row[3] for row in self.conn.execute("EXPLAIN QUERY PLAN " + query)]
+        self.assertIn("SEARCH d USING PRIMARY KEY (tag_id=?)", plan[0])
+        completed_id = self.conn.execute("SELECT id FROM tags WHERE name = 'completed'").fetchone()[0]
+        self.assertIn(f"d.tag_id = {completed_id}", query)
+
+    def test_filters_on_large_library_are_correct_and_index_driven(self):
+        """
+        Verifies AND, OR and NOT filters on a library with 1k tags against a
+        brute-force answer, and that none of them scans the whole urls table: every
+        plan reaches links by rowid from the url_tags primary key.
+        """
+        # Bulk fixture load; the sync journal is not what this test covers
+        self.conn.execute("UPDATE sync_state SET value = 1 WHERE key = 'replaying'")
+        self.conn.execute("""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 10000)
+            INSERT INTO urls (title, url, group_id) SELECT 'T' || i, 'https://big' || i || '.com', 1 FROM n
+        """)
+        self.conn.execute("""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1000)
+            INSERT INTO tags (name) SELECT 'tag' || i FROM n
+        """)
+        # tag1 is on every other link, tag2 on every tenth, tag3..1000 spread three per link
+        self.conn.execute("""
+            INSERT INTO url_tags (tag_id, url_id)
+            SELECT t.id, u.id FROM urls u JOIN tags t
+            ON (t.name = 'tag1' AND u.id % 2 = 0) OR (t.name = 'tag2' AND u.id % 10 = 0)
+            OR t.id = 3 + u.id % 998 OR t.id = 3 + (u.id * 7) % 998 OR t.id = 3 + (u.id * 13) % 998
+        """)
+        self.conn.commit()
+
+        tagged = {}
+        for tag, url_id in self.conn.execute("SELECT t.name, ut.url_id FROM url_tags ut JOIN tags t ON t.id = ut.tag_id"):
+            tagged.setdefault(tag, set()).add(url_id)
+        cases = [
+            ({"all_of": ["tag1", "tag2", "tag500"]}, tagged["tag1"] & tagged["tag2"] & tagged["tag500"]),
+            ({"any_of": ["tag2", "tag7"]}, tagged["tag2"] | tagged["tag7"]),
+            ({"all_of": ["tag2"], "none_of": ["tag1"]}, tagged["tag2"] - tagged["tag1"]),
+        ]
+        for kwargs, expected in cases:
+            captured = []
+            self.conn.set_trace_callback(captured.append)
+            rows = self.db.get_urls_by_tags(**kwargs)
+            self.conn.set_trace_callback(None)
+
+            self.assertEqual({row[0] for row in rows}, expected, kwargs)
+            plan = " | ".join(row[3] for row in self.conn.execute("EXPLAIN QUERY PLAN " + captured[-1]))
+            self.assertIn("SEARCH u USING INTEGER PRIMARY KEY", plan, kwargs)
+            self.assertNotIn("SCAN u", plan, kwargs)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,208 @@
+import unittest
+import sys
+import os
+from http.server import BaseHTTPRequestHandler
+
+# Ensure we can import the utils module from the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.extractors import (ChapterChecker, ChapterExtractor, ExtractorRegistry,
+                              extract_from_stream, format_chapter)
+from local_server import LocalServerTestCase
+import config
+
+CHAPTER_LINK = r"<a[^>]*>(?P<title>Chapter (?P<chapter>\d+(?:\.\d+)?)[^<]*)</a>"
+FILLER = b"<p>" + b"x" * 1000 + b"</p>"
+
+
+def counting_chunks(chunks, consumed):
+    """Yields the chunks while recording how many were actually pulled."""
+    for chunk in chunks:
+        consumed.append(chunk)
+        yield chunk
+
+
+class TestChapterExtractor(unittest.TestCase):
+
+    def test_regex_rule_extracts_chapter_and_title(self):
+        """
+        Verifies that a regex rule returns the chapter number and title of the first match.
+        """
+        extractor = ChapterExtractor(pattern=CHAPTER_LINK)
+        html = '<ul><li><a href="/c412">Chapter 412 - The Return</a></li><li><a>Chapter 411</a></li></ul>'
+        self.assertEqual(extractor.match(html, True), (412.0, "Chapter 412 - The Return"))
+
+    def test_selector_rule_extracts_chapter_from_element_text(self):
+        """
+        Verifies that a CSS selector rule pulls the number out of the selected element's text.
+        """
+        extractor = ChapterExtractor(selector="div.latest a")
+        html = '<div class="latest"><a href="/c">Ch. 12.5 Interlude</a></div><footer></footer>'
+        self.assertEqual(extractor.match(html, True), (12.5, "Ch. 12.5 Interlude"))
+
+    def test_selector_ignores_element_that_may_be_cut_off(self):
+        """
+        Verifies that an element at the very end of a partial page is not trusted,
+        because its text may still be incomplete ('Chapter 41' of 'Chapter 412').
+        """
+        extractor = ChapterExtractor(selector="div.latest a")
+        self.assertIsNone(extractor.match('<div class="latest"><a>Chapter 41', False))
+
+    def test_extractor_requires_pattern_or_selector(self):
+        """
+        Verifies that an empty rule is rejected when the registry is built.
+        """
+        with self.assertRaises(ValueError):
+            ChapterExtractor()
+
+    def test_format_chapter_drops_trailing_zero(self):
+        """
+        Verifies the card text shows 'Ch. 412' rather than 'Ch. 412.0'.
+        """
+        self.assertEqual(format_chapter(412.0), "412")
+        self.assertEqual(format_chapter(12.5), "12.5")
+
+
+class TestExtractorRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = ExtractorRegistry({
+            "novels.com": {"selector": "a.latest"},
+            "*": {"pattern": CHAPTER_LINK},
+        })
+
+    def test_subdomain_uses_parent_domain_rule(self):
+        """
+        Verifies that 'www.novels.com' and 'm.novels.com' share the 'novels.com' rule.
+        """
+        self.assertEqual(self.registry.for_url("https://www.novels.com/s/1").selector, "a.latest")
+        self.assertEqual(self.registry.for_url("https://m.novels.com:8080/s/1").selector, "a.latest")
+
+    def test_unknown_domain_uses_fallback_rule(self):
+        """
+        Verifies that sites without their own rule fall back to '*'.
+        """
+        self.assertIsNotNone(self.registry.for_url("https://other.org/s/1").pattern)
+
+    def test_no_rule_and_no_fallback_returns_none(self):
+        """
+        Verifies that without a '*' rule, unknown sites are simply skipped.
+        """
+        registry = ExtractorRegistry({"novels.com": {"selector": "a.latest"}})
+        self.assertIsNone(registry.for_url("https://other.org/s/1"))
+
+    def test_shipped_config_has_no_catch_all_rule(self):
+        """
+        Verifies that sites nobody wrote a rule for are not guessed at: a generic
+        'first chapter link' rule would report Chapter 1 on oldest-first lists.
+        """
+        self.assertIsNone(ExtractorRegistry(config.CHAPTER_EXTRACTORS).for_url("https://unknown-site.org/s/1"))
+
+
+class TestExtractFromStream(unittest.TestCase):
+
+    def test_stops_reading_once_the_extractor_matches(self):
+        """
+        Verifies the bounded partial read: when the chapter appears near the top of a
+        large page, the remaining chunks are never pulled from the stream.
+        """
+        chunks = [b'<a href="/c">Chapter 412</a>' + FILLER] + [FILLER] * 500
+        consumed = []
+        result, bytes_read = extract_from_stream(counting_chunks(chunks, consumed),
+                                                 ChapterExtractor(pattern=CHAPTER_LINK), 10 ** 7)
+        self.assertEqual(result[0], 412.0)
+        self.assertEqual(len(consumed), 1)
+        self.assertEqual(bytes_read, len(chunks[0]))
+
+    def test_match_split_across_chunks_is_found(self):
+        """
+        Verifies that a chapter link cut in half by a chunk boundary is still recognised
+        with the full number.
+        """
+        chunks = [FILLER + b'<a href="/c">Chapter 41', b'2 - Finale</a>' + FILLER]
+        result, _ = extract_from_stream(iter(chunks), ChapterExtractor(pattern=CHAPTER_LINK), 10 ** 7)
+        self.assertEqual(result, (412.0, "Chapter 412 - Finale"))
+
+    def test_stops_at_max_bytes_without_match(self):
+        """
+        Verifies that pages without any chapter are abandoned after max_bytes
+        instead of being downloaded completely.
+        """
+        consumed = []
+        result, bytes_read = extract_from_stream(counting_chunks([FILLER] * 500, consumed),
+                                                 ChapterExtractor(pattern=CHAPTER_LINK), 5000)
+        self.assertIsNone(result)
+        self.assertLess(len(consumed), 10)
+
+    def test_selector_rule_does_not_reparse_every_chunk(self):
+        """
+        Verifies that a selector rule on a long page without a match parses the
+        buffer only a logarithmic number of times, not once per chunk.
+        """
+        extractor = ChapterExtractor(selector="a.latest")
+        calls = []
+        original = extractor._match_selector
+        extractor._match_selector = lambda text, complete: calls.append(len(text)) or original(text, complete)
+
+        result, _ = extract_from_stream(iter([FILLER] * 500), extractor, 10 ** 7)
+        self.assertIsNone(result)
+        self.assertLess(len(calls), 15)
+        self.assertLess(sum(calls), 3 * len(FILLER) * 500)
+
+    def test_selector_match_is_found_after_buffer_grows(self):
+        """
+        Verifies that skipping parses does not lose a match that appears between them.
+        """
+        chunks = [FILLER] * 5 + [b'<a class="latest">Chapter 9</a>' + FILLER] + [FILLER] * 20
+        result, _ = extract_from_stream(iter(chunks), ChapterExtractor(selector="a.latest"), 10 ** 7)
+        self.assertEqual(result, (9.0, "Chapter 9"))
+
+    def test_multibyte_characters_split_across_chunks(self):
+        """
+        Verifies that UTF-8 characters split between chunks are decoded correctly.
+        """
+        data = '<a href="/c">Chapter 7 — 日本語</a>'.encode("utf-8")
+        chunks = [data[:30], data[30:]]
+        result, _ = extract_from_stream(iter(chunks), ChapterExtractor(pattern=CHAPTER_LINK), 10 ** 7)
+        self.assertEqual(result, (7.0, "Chapter 7 — 日本語"))
+
+
+class SeriesPageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/series":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            self.wfile.write(b'<ul><li><a href="/c">Chapter 88</a></li></ul>' + FILLER)
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestChapterChecker(LocalServerTestCase):
+    handler = SeriesPageHandler
+
+    def test_check_all_returns_only_pages_with_chapters(self):
+        """
+        Verifies the end-to-end check: pages with a chapter produce a result,
+        missing pages are dropped.
+        """
+        checker = ChapterChecker(ExtractorRegistry({"*": {"pattern": CHAPTER_LINK}}), max_workers=2, timeout=2)
+        results = checker.check_all([(1, self.base + "/series"), (2, self.base + "/missing")])
+        self.assertEqual(results, [(1, 88.0, "Chapter 88")])
+
+    def test_malformed_url_is_skipped(self):
+        """
+        Verifies that a URL urllib3 cannot parse is dropped like an unreachable page
+        instead of aborting the whole check.
+        """
+        checker = ChapterChecker(ExtractorRegistry({"*": {"pattern": CHAPTER_LINK}}), max_workers=2, timeout=2)
+        results = checker.check_all([(1, "https://" + "a" * 70 + ".com"), (2, self.base + "/series")])
+        self.assertEqual(results, [(2, 88.0, "Chapter 88")])
+
+
+if __name__ == '__main__':
+    unittest.main()
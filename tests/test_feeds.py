@@ -0,0 +1,236 @@
+import unittest
+import sys
+import os
+from http.server import BaseHTTPRequestHandler
+
+# Ensure we can import the utils module from the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.feeds import FeedChecker, feed_domain, find_feed_links, match_entries, parse_feed_entries
+from local_server import LocalServerTestCase
+
+RSS_FEED = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Site</title>
+  <item><title>Chapter 413</title><link>http://site/series/foo/chapter-413</link><guid>c413</guid></item>
+  <item><title>Chapter 90</title><link>http://site/series/bar/chapter-90</link><guid>b90</guid></item>
+  <item><title>Chapter 412</title><link>http://site/series/foo/chapter-412</link><guid>c412</guid></item>
+</channel></rss>"""
+
+ATOM_FEED = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Site</title>
+  <entry><id>tag:site,1</id><title>Ch. 7</title><link href="http://site/manga/x/7"/></entry>
+</feed>"""
+
+
+class TestFeedParsing(unittest.TestCase):
+
+    def test_find_feed_links_in_page_head(self):
+        """
+        Verifies that advertised RSS/Atom feeds are found and made absolute,
+        while unrelated <link> tags are ignored.
+        """
+        html = """<html><head>
+            <link rel="stylesheet" href="/style.css">
+            <link rel="alternate" type="application/rss+xml" href="/feed.xml">
+        </head></html>"""
+        self.assertEqual(find_feed_links(html, "https://site.com/series/foo"), ["https://site.com/feed.xml"])
+
+    def test_parse_rss_entries_in_order(self):
+        """
+        Verifies that RSS items are returned newest first as (id, title, link).
+        """
+        entries = parse_feed_entries([RSS_FEED])
+        self.assertEqual([e[0] for e in entries], ["c413", "b90", "c412"])
+        self.assertEqual(entries[0][1], "Chapter 413")
+
+    def test_parse_atom_entries_uses_href_links(self):
+        """
+        Verifies Atom support: namespaced entries and href-style links.
+        """
+        entries = parse_feed_entries([ATOM_FEED])
+        self.assertEqual(entries, [("tag:site,1", "Ch. 7", "http://site/manga/x/7")])
+
+    def test_parsing_stops_at_last_seen_entry(self):
+        """
+        Verifies the incremental poll: only entries newer than the last seen one are
+        returned, and later chunks are never pulled from the stream.
+        """
+        chunks = [RSS_FEED[i:i + 64] for i in range(0, len(RSS_FEED), 64)]
+        consumed = []
+
+        def stream():
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        entries = parse_feed_entries(stream(), stop_at_id="b90")
+        self.assertEqual([e[0] for e in entries], ["c413"])
+        self.assertLess(len(consumed), len(chunks))
+
+    def test_malformed_feed_returns_entries_parsed_so_far(self):
+        """
+        Verifies that a broken feed does not raise.
+        """
+        self.assertEqual(parse_feed_entries([b"<rss><channel><item>"]), [])
+
+    def test_match_entries_to_tracked_series(self):
+        """
+        Verifies that feed entries are assigned to the tracked series whose path
+        prefixes the chapter link, keeping the highest chapter per series.
+        """
+        tracked = [(1, "http://site/series/foo"), (2, "http://site/series/bar/"), (3, "http://site/series/baz")]
+        results = match_entries(parse_feed_entries([RSS_FEED]), tracked)
+        self.assertEqual(sorted(results), [(1, 413.0, "Chapter 413"), (2, 90.0, "Chapter 90")])
+
+    def test_match_does_not_confuse_similar_paths(self):
+        """
+        Verifies that '/series/foo' does not claim chapters of '/series/foobar'.
+        """
+        entries = [("x", "Chapter 5", "http://site/series/foobar/5")]
+        self.assertEqual(match_entries(entries, [(1, "http://site/series/foo")]), [])
+
+    def test_feed_domain_shares_www_and_bare_host(self):
+        """
+        Verifies that 'www.site.com' and 'site.com' share one feed.
+        """
+        self.assertEqual(feed_domain("https://www.Site.com/a"), feed_domain("https://site.com/b"))
+
+
+class FeedSiteHandler(BaseHTTPRequestHandler):
+    """Serves one site with an advertised, ETag-validated feed and one site without a feed."""
+    requests_seen = []
+
+    def do_GET(self):
+        FeedSiteHandler.requests_seen.append(self.path)
+        if self.path.startswith("/series/"):
+            body = b'<html><head><link rel="alternate" type="application/rss+xml" href="/rss"></head></html>'
+            self._send(200, body, "text/html")
+        elif self.path == "/rss":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self._send(304, b"")
+            else:
+                self._send(200, RSS_FEED.replace(b"http://site", self.base()), "application/rss+xml", '"v1"')
+        else:
+            self._send(404, b"")
+
+    def base(self):
+        return f"http://127.0.0.1:{self.server.server_port}".encode()
+
+    def _send(self, status, body, content_type="text/plain", etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestFeedChecker(LocalServerTestCase):
+    handler = FeedSiteHandler
+
+    def setUp(self):
+        FeedSiteHandler.requests_seen = []
+        self.checker = FeedChecker(max_workers=2, timeout=2)
+
+    def test_discover_finds_advertised_feed(self):
+        """
+        Verifies discovery through the <link rel="alternate"> tag of a series page.
+        """
+        self.assertEqual(self.checker.discover(self.base + "/series/foo"), self.base + "/rss")
+
+    def test_poll_uses_etag_for_conditional_requests(self):
+        """
+        Verifies that a second poll with the stored ETag gets 304 and no entries.
+        """
+        entries, etag, _ = self.checker.poll(self.base + "/rss")
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(etag, '"v1"')
+
+        entries, etag, _ = self.checker.poll(self.base + "/rss", etag=etag)
+        self.assertEqual(entries, [])
+        self.assertEqual(etag, '"v1"')
+
+    def test_poll_of_missing_feed_reports_broken(self):
+        """
+        Verifies that a feed returning 404 is reported as broken (None).
+        """
+        self.assertIsNone(self.checker.poll(self.base + "/gone")[0])
+
+    def test_malformed_url_is_treated_as_no_feed(self):
+        """
+        Verifies that discovery and polling of a URL urllib3 cannot parse return the
+        'no feed' / 'broken' answers instead of raising.
+        """
+        url = "https://" + "a" * 70 + ".com/rss"
+        self.assertIsNone(self.checker.discover(url))
+        self.assertIsNone(self.checker.poll(url)[0])
+
+    def test_check_polls_one_feed_for_many_series_on_a_site(self):
+        """
+        Verifies that request count grows with sites, not URLs: two tracked series on
+        the same site share one discovery and one feed request.
+        """
+        rows = [(1, self.base + "/series/foo", 412.0, 0), (2, self.base + "/series/bar", 89.0, 0)]
+        results, discovered, states, page_rows = self.checker.check(rows, {})
+
+        self.assertEqual(discovered, [("127.0.0.1:%d" % self.server.server_port, self.base + "/rss")])
+        self.assertEqual(FeedSiteHandler.requests_seen.count("/rss"), 1)
+        self.assertEqual(len([p for p in FeedSiteHandler.requests_seen if p.startswith("/series/")]), 1)
+        self.assertEqual(sorted(r[:2] for r in results), [(1, 413.0), (2, 90.0)])
+        self.assertEqual(states[0][3], "c413")
+        self.assertEqual(page_rows, [])
+
+    def test_check_sends_series_without_baseline_to_page_check(self):
+        """
+        Verifies that a series never checked before is still read from its page,
+        because a feed only shows recent chapters.
+        """
+        domain = "127.0.0.1:%d" % self.server.server_port
+        feeds = {domain: (self.base + "/rss", None, None, None)}
+        rows = [(1, self.base + "/series/foo", None, 0)]
+        results, _, _, page_rows = self.checker.check(rows, feeds)
+        self.assertEqual(results, [])
+        self.assertEqual(page_rows, [(1, self.base + "/series/foo")])
+
+    def test_check_keeps_page_checking_series_the_feed_never_mentions(self):
+        """
+        Verifies that a working feed with no entries for a series (e.g. a site-wide
+        blog feed) does not stop that series from being checked through its page.
+        """
+        domain = "127.0.0.1:%d" % self.server.server_port
+        feeds = {domain: (self.base + "/rss", None, None, None)}
+        rows = [(1, self.base + "/series/foo", 412.0, 0), (3, self.base + "/series/other", 5.0, 0)]
+        results, _, _, page_rows = self.checker.check(rows, feeds)
+        self.assertEqual([r[0] for r in results], [1])
+        self.assertEqual(page_rows, [(3, self.base + "/series/other")])
+
+    def test_check_skips_pages_of_series_the_feed_has_matched_before(self):
+        """
+        Verifies that a series already matched by its feed is not page-checked when
+        the feed has nothing new (304).
+        """
+        domain = "127.0.0.1:%d" % self.server.server_port
+        feeds = {domain: (self.base + "/rss", '"v1"', None, "c413")}
+        rows = [(1, self.base + "/series/foo", 413.0, 1), (3, self.base + "/series/other", 5.0, 0)]
+        results, _, _, page_rows = self.checker.check(rows, feeds)
+        self.assertEqual(results, [])
+        self.assertEqual(page_rows, [(3, self.base + "/series/other")])
+
+    def test_check_falls_back_to_pages_when_feed_is_broken(self):
+        """
+        Verifies that a stored feed which now fails is forgotten and its series are
+        checked through their pages instead.
+        """
+        domain = "127.0.0.1:%d" % self.server.server_port
+        feeds = {domain: (self.base + "/gone", None, None, None)}
+        rows = [(1, self.base + "/series/foo", 3.0, 0)]
+        _, discovered, _, page_rows = self.checker.check(rows, feeds)
+        self.assertEqual(discovered, [(domain, None)])
+        self.assertEqual(page_rows, [(1, self.base + "/series/foo")])
+
+
+if __name__ == '__main__':
+    unittest.main()
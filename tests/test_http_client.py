@@ -0,0 +1,198 @@
+import unittest
+import sys
+import os
+import tempfile
+from http.server import BaseHTTPRequestHandler
+
+# Ensure we can import the utils module from the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.http_client import HttpClient, freshness_lifetime, parse_cache_control
+from local_server import LocalServerTestCase
+
+
+class CacheTestHandler(BaseHTTPRequestHandler):
+    """Each path answers with a different caching policy."""
+    hits = {}
+
+    def do_GET(self):
+        CacheTestHandler.hits[self.path] = CacheTestHandler.hits.get(self.path, 0) + 1
+        if self.path == "/fresh":
+            self._send(200, b"fresh body", {"Cache-Control": "max-age=3600"})
+        elif self.path == "/no-store":
+            self._send(200, b"secret", {"Cache-Control": "no-store"})
+        elif self.path == "/etag":
+            if self.headers.get("If-None-Match") == '"abc"':
+                self._send(304, b"", {"ETag": '"abc"'})
+            else:
+                self._send(200, b"validated body", {"ETag": '"abc"', "Cache-Control": "no-cache"})
+        elif self.path.startswith("/big"):
+            self._send(200, self.path.encode() * 100, {"Cache-Control": "max-age=3600"})
+        elif self.path.startswith("/same"):
+            self._send(200, b"shared favicon bytes", {"Cache-Control": "max-age=3600"})
+        else:
+            self._send(404, b"", {})
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestFreshness(unittest.TestCase):
+
+    def test_parse_cache_control_directives(self):
+        """
+        Verifies parsing of directives with and without arguments.
+        """
+        self.assertEqual(parse_cache_control('max-age=60, No-Cache, private="x"'),
+                         {"max-age": "60", "no-cache": True, "private": "x"})
+
+    def test_max_age_wins_over_expires(self):
+        """
+        Verifies Cache-Control max-age takes precedence over Expires.
+        """
+        headers = {"Cache-Control": "max-age=60", "Expires": "Thu, 01 Jan 1970 00:00:00 GMT"}
+        self.assertEqual(freshness_lifetime(headers, 0), 60)
+
+    def test_expires_relative_to_date(self):
+        """
+        Verifies the Expires header is measured from the server's Date.
+        """
+        headers = {"Date": "Mon, 01 Jan 2024 00:00:00 GMT", "Expires": "Mon, 01 Jan 2024 01:00:00 GMT"}
+        self.assertEqual(freshness_lifetime(headers, 0), 3600)
+
+    def test_invalid_expires_means_stale(self):
+        """
+        Verifies that 'Expires: 0' is treated as already expired.
+        """
+        self.assertEqual(freshness_lifetime({"Expires": "0"}, 1000), 0)
+
+    def test_last_modified_heuristic_is_capped(self):
+        """
+        Verifies the fallback lifetime (10% of the age since Last-Modified) never exceeds one day.
+        """
+        headers = {"Date": "Mon, 01 Jan 2024 00:00:00 GMT", "Last-Modified": "Mon, 01 Jan 2018 00:00:00 GMT"}
+        self.assertEqual(freshness_lifetime(headers, 0), 24 * 3600)
+
+
+class TestHttpClient(LocalServerTestCase):
+    handler = CacheTestHandler
+
+    def setUp(self):
+        CacheTestHandler.hits = {}
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.client = HttpClient(self.tmpdir.name, timeout=2)
+
+    def tearDown(self):
+        self.client.close()
+        self.tmpdir.cleanup()
+
+    def test_fresh_response_is_served_from_cache(self):
+        """
+        Verifies that a response with max-age is fetched once and then served from disk.
+        """
+        first = self.client.get(self.base + "/fresh")
+        second = self.client.get(self.base + "/fresh")
+
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.content, b"fresh body")
+        self.assertEqual(CacheTestHandler.hits["/fresh"], 1)
+
+    def test_cache_survives_restart(self):
+        """
+        Verifies the cache is persistent: a new client on the same directory
+        (as after an app restart) does not hit the network again.
+        """
+        self.client.get(self.base + "/fresh")
+        self.client.close()
+
+        self.client = HttpClient(self.tmpdir.name, timeout=2)
+        self.assertTrue(self.client.get(self.base + "/fresh").from_cache)
+        self.assertEqual(CacheTestHandler.hits["/fresh"], 1)
+
+    def test_no_store_is_never_cached(self):
+        """
+        Verifies that responses marked no-store are always fetched.
+        """
+        self.client.get(self.base + "/no-store")
+        self.assertFalse(self.client.get(self.base + "/no-store").from_cache)
+        self.assertEqual(CacheTestHandler.hits["/no-store"], 2)
+
+    def test_stale_entry_is_revalidated_with_etag(self):
+        """
+        Verifies that a no-cache response is revalidated with If-None-Match and a
+        304 answer serves the stored body.
+        """
+        self.client.get(self.base + "/etag")
+        second = self.client.get(self.base + "/etag")
+
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.content, b"validated body")
+        self.assertEqual(CacheTestHandler.hits["/etag"], 2)
+        self.assertEqual(self.client.stats()["revalidations"], 1)
+
+    def test_error_responses_are_not_cached(self):
+        """
+        Verifies that a 404 is returned to the caller but not stored.
+        """
+        self.assertEqual(self.client.get(self.base + "/missing").status_code, 404)
+        self.assertEqual(self.client.stats()["bytes"], 0)
+
+    def test_identical_bodies_are_stored_once(self):
+        """
+        Verifies content addressing: two URLs with the same body share one object.
+        """
+        self.client.get(self.base + "/same/a")
+        self.client.get(self.base + "/same/b")
+        self.assertEqual(self.client.stats()["bytes"], len(b"shared favicon bytes"))
+
+    def test_size_cap_evicts_least_recently_used(self):
+        """
+        Verifies the total size cap: when a new body does not fit, the entry used
+        longest ago is evicted and the recently used one is kept.
+        """
+        self.client.close()
+        body_size = len(b"/big/1" * 100)
+        self.client = HttpClient(self.tmpdir.name, max_bytes=body_size * 2, timeout=2)
+
+        self.client.get(self.base + "/big/1")
+        self.client.get(self.base + "/big/2")
+        self.client.get(self.base + "/big/1")  # Touch 1 so 2 becomes least recently used
+        self.client.get(self.base + "/big/3")
+
+        self.assertLessEqual(self.client.stats()["bytes"], body_size * 2)
+        self.assertTrue(self.client.get(self.base + "/big/1").from_cache)
+        self.assertFalse(self.client.get(self.base + "/big/2").from_cache)
+
+    def test_stale_copy_is_used_when_network_fails(self):
+        """
+        Verifies that an expired entry is still returned when the server is unreachable.
+        """
+        self.client.get(self.base + "/etag")
+        self.client.cache.conn.execute("UPDATE entries SET url = ?", ("http://127.0.0.1:9/etag",))
+        self.client.cache.conn.commit()
+
+        response = self.client.get("http://127.0.0.1:9/etag")
+        self.assertTrue(response.from_cache)
+        self.assertEqual(response.content, b"validated body")
+
+    def test_hit_rate_statistics(self):
+        """
+        Verifies the hit-rate counter: one miss followed by three hits is 75%.
+        """
+        for _ in range(4):
+            self.client.get(self.base + "/fresh")
+        stats = self.client.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (3, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 0.75)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -130,5 +130,31 @@ class TestImporters(unittest.TestCase):
         # Based on 'find_previous_sibling' logic, it grabs the immediate header.
         self.assertEqual(data[0][2], "Level 2")
 
+    def test_with_folders_returns_full_folder_path(self):
+        """
+        Verifies the folder-path output used for tags: every enclosing folder is listed
+        outermost first, and the browser's toolbar folder is left out.
+        """
+        html_content = """
+        <DL><p>
+            <DT><H3 PERSONAL_TOOLBAR_FOLDER="true">Bookmarks bar</H3>
+            <DL><p>
+                <DT><H3>Manga</H3>
+                <DL><p>
+                    <DT><H3>Korean</H3>
+                    <DL><p>
+                        <DT><A HREF="https://k.com">K</A>
+                    </DL><p>
+                </DL><p>
+                <DT><A HREF="https://top.com">Top</A>
+            </DL><p>
+        </DL><p>
+        """
+        with patch("builtins.open", mock_open(read_data=html_content)):
+            data = ImportManager.parse_bookmarks_html("fake.html", with_folders=True)
+
+        self.assertEqual(data[0], ("K", "https://k.com", "Korean", ("Manga", "Korean")))
+        self.assertEqual(data[1][3], ())
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,149 @@
+import unittest
+import sys
+import os
+from http.server import BaseHTTPRequestHandler
+
+# Ensure we can import the utils module from the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.link_checker import LinkChecker, STATUS_UNREACHABLE
+from local_server import LocalServerTestCase
+
+
+class FakeSiteHandler(BaseHTTPRequestHandler):
+    """A tiny web server that imitates the ways novel sites break."""
+    get_requests = []
+
+    def _respond(self):
+        if self.path == "/ok":
+            self.send_response(200)
+        elif self.path == "/moved":
+            self.send_response(301)
+            self.send_header("Location", "/ok")
+        elif self.path == "/":
+            self.send_response(200)
+        elif self.path == "/dead-series":
+            self.send_response(301)
+            self.send_header("Location", "/")
+        elif self.path == "/moved-to-missing":
+            self.send_response(301)
+            self.send_header("Location", "/gone")
+        elif self.path == "/temporary":
+            self.send_response(302)
+            self.send_header("Location", "/ok")
+        elif self.path == "/no-head" and self.command == "HEAD":
+            self.send_response(405)
+        elif self.path == "/no-head":
+            self.send_response(200)
+        else:
+            self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._respond()
+
+    def do_GET(self):
+        FakeSiteHandler.get_requests.append(self.path)
+        self._respond()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestLinkChecker(LocalServerTestCase):
+    handler = FakeSiteHandler
+
+    def setUp(self):
+        FakeSiteHandler.get_requests = []
+        self.checker = LinkChecker(max_workers=4, timeout=2)
+
+    def test_healthy_link_reports_200_without_get(self):
+        """
+        Verifies the happy path: a working link is answered by HEAD alone,
+        so the page body is never requested.
+        """
+        result = self.checker.check_url(1, self.base + "/ok")
+        self.assertEqual(result, (1, 200, None, False))
+        self.assertEqual(FakeSiteHandler.get_requests, [])
+
+    def test_permanent_redirect_is_flagged_as_moved(self):
+        """
+        Verifies that a 301 redirect records the final URL and marks the
+        link as permanently moved so it can be rewritten.
+        """
+        url_id, status, final_url, moved = self.checker.check_url(2, self.base + "/moved")
+        self.assertEqual(status, 200)
+        self.assertEqual(final_url, self.base + "/ok")
+        self.assertTrue(moved)
+
+    def test_permanent_redirect_to_site_root_is_not_flagged_as_moved(self):
+        """
+        Verifies that a dead page redirected to the homepage is not treated as a
+        move, so the stored series URL is never replaced by the site root.
+        """
+        url_id, status, final_url, moved = self.checker.check_url(2, self.base + "/dead-series")
+        self.assertEqual(status, 200)
+        self.assertEqual(final_url, self.base + "/")
+        self.assertFalse(moved)
+
+    def test_permanent_redirect_to_missing_page_is_not_flagged_as_moved(self):
+        """
+        Verifies that a 301 ending in an error status does not count as a move.
+        """
+        url_id, status, final_url, moved = self.checker.check_url(2, self.base + "/moved-to-missing")
+        self.assertEqual(status, 404)
+        self.assertFalse(moved)
+
+    def test_temporary_redirect_is_not_flagged_as_moved(self):
+        """
+        Verifies that a 302 redirect is recorded but NOT treated as a permanent move,
+        because the site may switch back.
+        """
+        _, _, final_url, moved = self.checker.check_url(3, self.base + "/temporary")
+        self.assertEqual(final_url, self.base + "/ok")
+        self.assertFalse(moved)
+
+    def test_head_rejected_falls_back_to_get(self):
+        """
+        Verifies the HEAD-then-GET fallback: servers answering HEAD with 405
+        are retried with GET and reported with the GET status.
+        """
+        result = self.checker.check_url(4, self.base + "/no-head")
+        self.assertEqual(result[1], 200)
+        self.assertEqual(FakeSiteHandler.get_requests, ["/no-head"])
+
+    def test_missing_page_reports_404(self):
+        """
+        Verifies that a removed page is reported with its error status.
+        """
+        self.assertEqual(self.checker.check_url(5, self.base + "/gone")[1], 404)
+
+    def test_unreachable_host_reports_status_zero(self):
+        """
+        Verifies that connection errors do not raise but are recorded
+        with the special 'unreachable' status.
+        """
+        result = self.checker.check_url(6, "http://127.0.0.1:9/nothing-listens-here")
+        self.assertEqual(result, (6, STATUS_UNREACHABLE, None, False))
+
+    def test_malformed_url_reports_status_zero(self):
+        """
+        Verifies that a stored URL urllib3 cannot even parse (a host label over 63
+        characters) is recorded as unreachable instead of aborting the whole check.
+        """
+        results = self.checker.check_all([(7, "https://" + "a" * 70 + ".com"), (8, self.base + "/ok")])
+        self.assertEqual(results, [(7, STATUS_UNREACHABLE, None, False), (8, 200, None, False)])
+
+    def test_check_all_returns_one_result_per_url_in_order(self):
+        """
+        Verifies that the concurrent bulk check returns results in the same
+        order as the input rows.
+        """
+        rows = [(i, self.base + path) for i, path in enumerate(["/ok", "/gone", "/moved", "/ok"])]
+        results = self.checker.check_all(rows)
+        self.assertEqual([r[0] for r in results], [0, 1, 2, 3])
+        self.assertEqual([r[1] for r in results], [200, 404, 200, 200])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+
+# Ensure we can import the project modules from the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.db_manager import DatabaseManager
+from utils.open_tracker import OpenEventBuffer
+
+
+class TestOpenEventBuffer(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Uses a real database file, because flushes happen on background threads
+        and an in-memory connection cannot be shared between threads.
+        """
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmpdir.name, "test.db"))
+        self.db.add_url("https://novel.com", "General")
+        self.url_id = self.db.get_urls_by_group("General")[0][0]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _count(self):
+        conn = sqlite3.connect(self.db.db_name)
+        try:
+            return conn.execute("SELECT open_count FROM urls WHERE id=?", (self.url_id,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_record_does_not_write_until_flush(self):
+        """
+        Verifies write-behind: recording an open only touches memory.
+        """
+        buffer = OpenEventBuffer(self.db, flush_interval=60, max_pending=100)
+        buffer.record(self.url_id)
+        self.assertEqual(self._count(), 0)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(self._count(), 1)
+
+    def test_recorded_chapter_is_what_gets_marked_seen(self):
+        """
+        Verifies that the chapter passed at click time travels with the event, so a
+        chapter found before the flush is not marked as read.
+        """
+        self.db.save_chapter_results([(self.url_id, 1.0, None)])
+        self.db.save_chapter_results([(self.url_id, 2.0, None)])
+        buffer = OpenEventBuffer(self.db, flush_interval=60, max_pending=100)
+        buffer.record(self.url_id, 2.0)
+        self.db.save_chapter_results([(self.url_id, 3.0, None)])
+        buffer.flush()
+
+        self.assertEqual(self.db.get_urls_by_group("General")[0][5], 1)
+
+    def test_flush_writes_all_pending_events_in_one_batch(self):
+        """
+        Verifies that many clicks become a single batched write.
+        """
+        buffer = OpenEventBuffer(self.db, flush_interval=60, max_pending=100)
+        for _ in range(10):
+            buffer.record(self.url_id)
+        self.assertEqual(buffer.flush(), 10)
+        self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(self._count(), 10)
+
+    def test_reaching_max_pending_flushes_in_background(self):
+        """
+        Verifies the size trigger: once max_pending events are waiting they are
+        written without an explicit flush.
+        """
+        buffer = OpenEventBuffer(self.db, flush_interval=60, max_pending=3)
+        for _ in range(3):
+            buffer.record(self.url_id)
+        deadline = time.time() + 2
+        while self._count() < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self._count(), 3)
+
+    def test_timer_flushes_periodically(self):
+        """
+        Verifies the timer trigger writes events without reaching max_pending.
+        """
+        buffer = OpenEventBuffer(self.db, flush_interval=0.05, max_pending=100)
+        buffer.start()
+        try:
+            buffer.record(self.url_id)
+            deadline = time.time() + 2
+            while self._count() < 1 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(self._count(), 1)
+        finally:
+            buffer.close()
+
+    def test_close_flushes_remaining_events(self):
+        """
+        Verifies that nothing is lost at shutdown.
+        """
+        buffer = OpenEventBuffer(self.db, flush_interval=60, max_pending=100)
+        buffer.start()
+        buffer.record(self.url_id)
+        buffer.record(self.url_id)
+        buffer.close()
+        self.assertEqual(self._count(), 2)
+
+    def test_failed_write_keeps_events_for_retry(self):
+        """
+        Verifies that events are put back when the database write fails.
+        """
+        class FailingDb:
+            def record_opens(self, events):
+                return False
+
+        buffer = OpenEventBuffer(FailingDb(), flush_interval=60, max_pending=100)
+        buffer.record(self.url_id)
+        self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(len(buffer.pending), 1)
+
+
+    def test_events_wait_while_database_is_not_open(self):
+        """
+        Verifies that clicks made before the app has opened the database are kept
+        and written once it is available.
+        """
+        buffer = OpenEventBuffer(None, flush_interval=60, max_pending=100)
+        buffer.record(self.url_id)
+        self.assertEqual(buffer.flush(), 0)
+        buffer.db = self.db
+        self.assertEqual(buffer.flush(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
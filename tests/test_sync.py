@@ -0,0 +1,418 @@
+import unittest
+import sys
+import os
+import gzip
+import json
+import random
+import sqlite3
+import tempfile
+
+# Ensure we can import the project modules from the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.db_manager import DatabaseManager
+from utils.sync import SyncFolder
+
+
+class TestChangeJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.db = DatabaseManager(":memory:", node_id="alpha")
+        self.conn = self.db.memory_conn
+
+    def tearDown(self):
+        self.db.memory_conn.close()
+
+    def journal(self):
+        return [tuple(row) for row in self.conn.execute(
+            "SELECT clock, node, entity, key, field, value FROM change_log ORDER BY seq")]
+
+    def test_mutations_are_journaled_with_increasing_clocks(self):
+        """
+        Verifies that adding a group and a link, retitling, moving and deleting it each
+        append field changes stamped with this node and a growing clock.
+        """
+        self.db.add_group("Reading")
+        self.db.add_url("https://a.com", "General")
+        url_id = self.db.get_urls_by_group("General")[0][0]
+        self.db.retitle_urls({url_id: "A"})
+        self.db.move_urls([url_id], "Reading")
+        self.db.delete_url(url_id)
+
+        changes = [row[2:] for row in self.journal()]
+        self.assertEqual(changes, [
+            ("group", "General", "present", 1),
+            ("group", "Reading", "present", 1),
+            ("url", "https://a.com", "present", 1),
+            ("url", "https://a.com", "title", "a.com"),
+            ("url", "https://a.com", "group", "General"),
+            ("url", "https://a.com", "title", "A"),
+            ("url", "https://a.com", "group", "Reading"),
+            ("url", "https://a.com", "present", 0),
+        ])
+        clocks = [row[0] for row in self.journal()]
+        self.assertEqual(clocks, sorted(clocks))
+        self.assertEqual({row[1] for row in self.journal()}, {"alpha"})
+
+    def test_bulk_import_with_tags_is_journaled(self):
+        """
+        Verifies that bulk import records new groups, links and their tags.
+        """
+        self.db.bulk_add_urls([("K", "https://k.com", "Manga", ("manga", "korean"))])
+        fields = {(row[3], row[4], row[5]) for row in self.journal()}
+        self.assertIn(("Manga", "present", 1), fields)
+        self.assertIn(("https://k.com", "tag:manga", 1), fields)
+        self.assertIn(("https://k.com", "tag:korean", 1), fields)
+
+    def test_journal_export_keeps_only_newest_version_of_each_field(self):
+        """
+        Verifies delta compaction: a title changed three times since the last sync is sent once.
+        """
+        self.db.add_url("https://a.com", "General")
+        after, _ = self.db.get_journal(0)
+        url_id = self.db.get_urls_by_group("General")[0][0]
+        for title in ("One", "Two", "Three"):
+            self.db.retitle_urls({url_id: title})
+
+        last_seq, changes = self.db.get_journal(after)
+        self.assertEqual([change[2:] for change in changes], [("url", "https://a.com", "title", "Three")])
+        self.assertEqual(last_seq, after + 3)
+
+    def test_existing_library_is_seeded_into_journal(self):
+        """
+        Verifies that a database created before the journal existed gets its current
+        contents recorded once, so a first sync can carry the whole library.
+        """
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE groups (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL)")
+        conn.execute("""
+            CREATE TABLE urls (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, url TEXT NOT NULL UNIQUE,
+                               group_id INTEGER, favicon_blob BLOB, last_opened DATETIME)
+        """)
+        conn.execute("INSERT INTO groups (name) VALUES ('General')")
+        conn.execute("INSERT INTO urls (title, url, group_id) VALUES ('Old', 'https://old.com', 1)")
+        old_db = DatabaseManager.__new__(DatabaseManager)
+        old_db.db_name = ":memory:"
+        old_db.memory_conn = conn
+        old_db.init_db("beta")
+
+        _, changes = old_db.get_journal(0)
+        self.assertIn((1, "beta", "url", "https://old.com", "title", "Old"), changes)
+        self.assertIn((1, "beta", "group", "General", "present", 1), changes)
+        conn.close()
+
+
+class TestSyncFolder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.folder = SyncFolder(self.tmpdir.name)
+        self.alpha = DatabaseManager(":memory:", node_id="alpha")
+        self.beta = DatabaseManager(":memory:", node_id="beta")
+
+    def tearDown(self):
+        self.alpha.memory_conn.close()
+        self.beta.memory_conn.close()
+        self.tmpdir.cleanup()
+
+    def rows(self, db):
+        """Library contents in a machine-independent form."""
+        return sorted(tuple(row) for row in db.memory_conn.execute("""
+            SELECT u.url, u.title, g.name,
+                   (SELECT group_concat(name) FROM (
+                        SELECT t.name FROM url_tags ut JOIN tags t ON t.id = ut.tag_id
+                        WHERE ut.url_id = u.id ORDER BY t.name))
+            FROM urls u JOIN groups g ON g.id = u.group_id
+        """))
+
+    def url_id(self, db, url):
+        return db.memory_conn.execute("SELECT id FROM urls WHERE url = ?", (url,)).fetchone()[0]
+
+    def round_trip(self):
+        self.folder.sync(self.alpha)
+        self.folder.sync(self.beta)
+        self.folder.sync(self.alpha)
+
+    def test_changes_reach_other_machine(self):
+        """
+        Verifies a one-way sync: groups, links, titles and tags added on one machine
+        appear on the other.
+        """
+        self.alpha.bulk_add_urls([("K", "https://k.com", "Manga", ("korean",))])
+        self.alpha.add_url("https://a.com", "General")
+
+        self.assertEqual(self.folder.push(self.alpha), 9)
+        self.folder.pull(self.beta)
+
+        self.assertIn("Manga", self.beta.get_groups())
+        self.assertEqual(self.rows(self.beta), self.rows(self.alpha))
+        self.assertIn(("https://k.com", "K", "Manga", "korean"), self.rows(self.beta))
+
+    def test_deletes_propagate(self):
+        """
+        Verifies that deleting a link and a whole group on one machine removes them on the other.
+        """
+        self.alpha.bulk_add_urls([("A", "https://a.com", "Reading"), ("B", "https://b.com", "General")])
+        self.round_trip()
+
+        self.beta.delete_group("Reading")
+        self.beta.delete_url(self.url_id(self.beta, "https://b.com"))
+        self.round_trip()
+
+        self.assertEqual(self.rows(self.alpha), [])
+        self.assertNotIn("Reading", self.alpha.get_groups())
+
+    def test_only_new_changes_are_exported(self):
+        """
+        Verifies that sync cost follows the number of changes: a push with nothing new
+        writes no file, and the next delta holds just the new change.
+        """
+        self.alpha.bulk_add_urls([(f"T{i}", f"https://site{i}.com", "General") for i in range(200)])
+        self.folder.push(self.alpha)
+        self.assertEqual(self.folder.push(self.alpha), 0)
+
+        self.alpha.retitle_urls({self.url_id(self.alpha, "https://site7.com"): "Seven"})
+        self.assertEqual(self.folder.push(self.alpha), 1)
+
+        files = sorted(os.listdir(os.path.join(self.tmpdir.name, "alpha")))
+        self.assertEqual(len(files), 2)
+        with gzip.open(os.path.join(self.tmpdir.name, "alpha", files[-1]), "rt", encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)["changes"]), 1)
+
+        self.folder.pull(self.beta)
+        self.assertEqual(len(self.rows(self.beta)), 200)
+        self.assertIn(("https://site7.com", "Seven", "General", None), self.rows(self.beta))
+
+    def test_pulling_twice_applies_nothing_new(self):
+        """
+        Verifies that re-reading the folder is harmless and cheap.
+        """
+        self.alpha.add_url("https://a.com", "General")
+        self.folder.push(self.alpha)
+        self.assertGreater(self.folder.pull(self.beta), 0)
+        self.assertEqual(self.folder.pull(self.beta), 0)
+
+        self.beta.set_sync_cursor("peer:alpha", 0)
+        self.assertEqual(self.folder.pull(self.beta), 0)
+
+    def test_concurrent_edits_converge_last_writer_wins(self):
+        """
+        Verifies a conflict: both machines retitle the same link without syncing. The
+        edit with the later logical clock wins on both sides, and an independent edit
+        to another field of the same link is kept.
+        """
+        self.alpha.add_group("Reading")
+        self.alpha.add_url("https://a.com", "General")
+        self.round_trip()
+
+        a_id, b_id = self.url_id(self.alpha, "https://a.com"), self.url_id(self.beta, "https://a.com")
+        self.alpha.retitle_urls({a_id: "From alpha"})
+        self.beta.retitle_urls({b_id: "From beta"})
+        self.beta.retitle_urls({b_id: "From beta, later"})
+        self.alpha.move_urls([a_id], "Reading")
+        self.round_trip()
+
+        self.assertEqual(self.rows(self.alpha), self.rows(self.beta))
+        self.assertEqual(self.rows(self.alpha), [("https://a.com", "From beta, later", "Reading", None)])
+
+    def test_clock_ties_are_broken_by_node(self):
+        """
+        Verifies determinism when two edits carry the same clock: the larger node id
+        wins on both machines regardless of who pulls first.
+        """
+        self.alpha.add_url("https://a.com", "General")
+        self.round_trip()
+        self.alpha.retitle_urls({self.url_id(self.alpha, "https://a.com"): "alpha"})
+        self.beta.retitle_urls({self.url_id(self.beta, "https://a.com"): "beta"})
+        self.round_trip()
+
+        self.assertEqual(self.rows(self.alpha)[0][1], "beta")
+        self.assertEqual(self.rows(self.beta)[0][1], "beta")
+
+    def test_pull_advances_lamport_clock(self):
+        """
+        Verifies that after seeing a peer's changes, this machine's next edit is
+        stamped later than all of them.
+        """
+        for i in range(20):
+            self.alpha.add_group(f"G{i}")
+        self.folder.push(self.alpha)
+        self.folder.pull(self.beta)
+        alpha_clock = self.alpha.get_sync_cursor("clock")
+
+        self.beta.add_group("After")
+        self.assertGreater(self.beta.get_sync_cursor("clock"), alpha_clock)
+
+    def test_link_added_to_group_deleted_elsewhere_is_kept(self):
+        """
+        Verifies the group-delete conflict: a link added on one machine to a group the
+        other machine deleted ends up in General on both, instead of being lost.
+        """
+        self.alpha.add_group("Reading")
+        self.round_trip()
+        self.alpha.delete_group("Reading")
+        self.beta.add_url("https://new.com", "Reading")
+        self.round_trip()
+
+        self.assertEqual(self.rows(self.alpha), [("https://new.com", "new.com", "General", None)])
+        self.assertEqual(self.rows(self.beta), self.rows(self.alpha))
+
+    def test_changes_made_under_an_earlier_node_id_are_still_exported(self):
+        """
+        Verifies that renaming the node (a new hostname, or a copied library file) before
+        a push does not strand edits stamped with the old id, and that they keep that
+        stamp so last-writer-wins still agrees on every machine.
+        """
+        self.alpha.add_url("https://a.com", "General")
+        self.alpha.init_db("gamma")
+        self.alpha.add_url("https://b.com", "General")
+
+        self.folder.push(self.alpha)
+        self.assertEqual(os.listdir(self.tmpdir.name), ["gamma"])
+        self.folder.pull(self.beta)
+
+        self.assertEqual(self.rows(self.beta), self.rows(self.alpha))
+        nodes = {row[0] for row in self.beta.memory_conn.execute(
+            "SELECT node FROM change_log WHERE key = 'https://a.com'")}
+        self.assertEqual(nodes, {"alpha"})
+
+    def test_changes_pulled_from_peers_are_not_exported_again(self):
+        """
+        Verifies that only edits made on this machine are pushed, not ones it applied from others.
+        """
+        self.alpha.bulk_add_urls([(f"T{i}", f"https://site{i}.com", "General") for i in range(20)])
+        self.folder.push(self.alpha)
+        self.folder.pull(self.beta)
+
+        _, changes = self.beta.get_journal(0)
+        self.assertEqual({change[1] for change in changes}, {"beta"})
+
+    def test_upgraded_journal_keeps_peer_rows_out_of_exports(self):
+        """
+        Verifies that a journal written before rows were flagged as local still exports
+        its own edits, under any node id, but not the rows it pulled from known peers.
+        """
+        self.alpha.add_url("https://a.com", "General")
+        self.folder.push(self.alpha)
+        self.folder.pull(self.beta)
+        self.beta.add_url("https://b.com", "General")
+
+        conn = self.beta.memory_conn
+        conn.execute("ALTER TABLE change_log DROP COLUMN origin_local")
+        conn.execute("UPDATE sync_state SET value = 'delta' WHERE key = 'node'")
+        self.beta.init_db()
+
+        _, changes = self.beta.get_journal(0)
+        self.assertEqual({change[1] for change in changes}, {"beta"})
+        self.assertIn("https://b.com", {change[3] for change in changes})
+
+    def test_title_survives_link_deleted_and_added_again_elsewhere(self):
+        """
+        Verifies that when a peer re-adds a link, it is rebuilt with the newest title
+        from the journal instead of the default one.
+        """
+        self.beta.add_url("https://s2.com/p", "General")
+        self.beta.retitle_urls({self.url_id(self.beta, "https://s2.com/p"): "X"})
+        self.alpha.add_url("https://s2.com/p", "General")
+        self.alpha.delete_url(self.url_id(self.alpha, "https://s2.com/p"))
+        self.folder.sync(self.alpha)
+        self.alpha.add_url("https://s2.com/p", "General")
+        self.beta.retitle_urls({self.url_id(self.beta, "https://s2.com/p"): "Y"})
+        self.round_trip()
+        self.folder.sync(self.beta)
+
+        self.assertEqual(self.rows(self.alpha), self.rows(self.beta))
+
+    def test_link_returns_to_group_created_again(self):
+        """
+        Verifies that a link left in General because its group was deleted elsewhere
+        moves back on every machine once the group is created again.
+        """
+        self.alpha.add_group("G1")
+        self.round_trip()
+        self.beta.delete_group("G1")
+        self.folder.sync(self.beta)
+        self.alpha.add_url("https://a.com", "G1")
+        self.folder.sync(self.alpha)
+        self.folder.sync(self.beta)
+        self.beta.add_group("G1")
+        self.round_trip()
+        self.folder.sync(self.beta)
+
+        self.assertEqual(self.rows(self.alpha), [("https://a.com", "a.com", "G1", None)])
+        self.assertEqual(self.rows(self.beta), self.rows(self.alpha))
+
+    def test_random_edits_on_three_machines_converge(self):
+        """
+        Verifies convergence: after random interleaved edits and partial syncs on three
+        machines, a few full sync rounds leave every library identical.
+        """
+        urls = [f"https://s{i}.com/p" for i in range(4)]
+        for seed in range(60):
+            rng = random.Random(seed)
+            with tempfile.TemporaryDirectory() as tmp:
+                folder = SyncFolder(tmp)
+                dbs = [DatabaseManager(":memory:", node_id=name) for name in ("n1", "n2", "n3")]
+                for _ in range(40):
+                    db = rng.choice(dbs)
+                    ids = [row[0] for row in db.memory_conn.execute("SELECT id FROM urls")]
+                    groups = db.get_groups()
+                    op = rng.randrange(9)
+                    if op == 0:
+                        db.add_url(rng.choice(urls), rng.choice(groups))
+                    elif op == 1 and ids:
+                        db.delete_url(rng.choice(ids))
+                    elif op == 2 and ids:
+                        db.retitle_urls({rng.choice(ids): rng.choice("XYZ")})
+                    elif op == 3 and ids:
+                        db.move_urls([rng.choice(ids)], rng.choice(groups))
+                    elif op == 4:
+                        db.add_group(rng.choice(("G1", "G2")))
+                    elif op == 5 and len(groups) > 1:
+                        db.delete_group(rng.choice([g for g in groups if g != "General"]))
+                    elif op == 6 and ids:
+                        db.tag_urls([rng.choice(ids)], [rng.choice(("t1", "t2"))])
+                    elif op == 7 and ids:
+                        db.untag_urls([rng.choice(ids)], [rng.choice(("t1", "t2"))])
+                    else:
+                        folder.sync(db)
+                for _ in range(3):
+                    for db in dbs:
+                        folder.sync(db)
+
+                states = [(self.rows(db), sorted(db.get_groups())) for db in dbs]
+                for db in dbs:
+                    db.memory_conn.close()
+            self.assertEqual(states[1], states[0], f"seed {seed}")
+            self.assertEqual(states[2], states[0], f"seed {seed}")
+
+    def test_failure_before_any_change_returns_none(self):
+        """
+        Verifies that a database error raised before the first change is read (for
+        example a locked database) is reported as None instead of escaping.
+        """
+        self.beta.memory_conn.execute("DROP TABLE sync_state")
+        with self.assertLogs(level="ERROR") as logs:
+            self.assertIsNone(self.beta.apply_changes("alpha", [], 1))
+        self.assertIn("alpha", logs.output[0])
+
+    def test_incomplete_delta_is_retried_later(self):
+        """
+        Verifies that a delta that cannot be read yet (e.g. still being copied by a sync
+        client) stops the pull for that peer without losing its place.
+        """
+        self.alpha.add_url("https://a.com", "General")
+        self.folder.push(self.alpha)
+        path = os.path.join(self.tmpdir.name, "alpha", os.listdir(os.path.join(self.tmpdir.name, "alpha"))[0])
+        with open(path, "rb") as f:
+            complete = f.read()
+        with open(path, "wb") as f:
+            f.write(complete[:10])
+
+        self.assertEqual(self.folder.pull(self.beta), 0)
+        with open(path, "wb") as f:
+            f.write(complete)
+        self.assertGreater(self.folder.pull(self.beta), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Ensure we can import the utils module from the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.view_snapshot import icon_key, load_snapshot, save_snapshot
+
+ICON = b"\x89PNG fake icon bytes"
+
+
+class TestViewSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "snapshot.json")
+        self.icon_dir = os.path.join(self.tmpdir.name, "icons")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_snapshot_round_trip(self):
+        """
+        Verifies that the saved view (group, sort, sidebar groups and card rows,
+        including favicons) is restored exactly on the next launch.
+        """
+        rows = [(1, "Novel", "https://novel.com", ICON, 412.0, 1),
+                (2, "Manga", "https://manga.com", None, None, 0)]
+        groups = [("General", 3, 0), ("Reading", 2, 1)]
+        save_snapshot(self.path, self.icon_dir, "Reading", "recent", groups, rows)
+
+        self.assertEqual(load_snapshot(self.path, self.icon_dir), ("Reading", "recent", groups, rows))
+
+    def test_icons_are_stored_once_by_content_hash(self):
+        """
+        Verifies that favicons live outside the JSON under their hash, so sites
+        sharing an icon store it only once.
+        """
+        rows = [(1, "A", "https://a.com/1", ICON, None, 0), (2, "B", "https://a.com/2", ICON, None, 0)]
+        save_snapshot(self.path, self.icon_dir, "All URLs", "default", [], rows)
+
+        self.assertEqual(os.listdir(self.icon_dir), [icon_key(ICON)])
+        with open(self.path, encoding="utf-8") as f:
+            self.assertNotIn("PNG", f.read())
+
+    def test_unused_icons_are_pruned(self):
+        """
+        Verifies that icons of rows no longer in the snapshot are deleted.
+        """
+        save_snapshot(self.path, self.icon_dir, "All URLs", "default", [], [(1, "A", "u", ICON, None, 0)])
+        save_snapshot(self.path, self.icon_dir, "All URLs", "default", [], [(2, "B", "v", None, None, 0)])
+        self.assertEqual(os.listdir(self.icon_dir), [])
+
+    def test_snapshot_is_capped_to_max_rows(self):
+        """
+        Verifies the snapshot only keeps the first screenful of rows.
+        """
+        rows = [(i, "T", f"https://s{i}.com", None, None, 0) for i in range(100)]
+        save_snapshot(self.path, self.icon_dir, "All URLs", "default", [], rows, max_rows=10)
+        self.assertEqual(len(load_snapshot(self.path, self.icon_dir)[3]), 10)
+
+    def test_missing_snapshot_returns_none(self):
+        """
+        Verifies the very first launch (no snapshot yet) is handled.
+        """
+        self.assertIsNone(load_snapshot(self.path, self.icon_dir))
+
+    def test_corrupt_snapshot_returns_none(self):
+        """
+        Verifies that a damaged snapshot is ignored instead of stopping the app from starting.
+        """
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        self.assertIsNone(load_snapshot(self.path, self.icon_dir))
+
+    def test_snapshot_from_other_version_is_ignored(self):
+        """
+        Verifies that snapshots written by a different format version are not used.
+        """
+        with open(self.path, "w") as f:
+            json.dump({"version": 999, "group": "x", "sort": "default", "groups": [], "rows": []}, f)
+        self.assertIsNone(load_snapshot(self.path, self.icon_dir))
+
+    def test_missing_icon_file_loads_row_without_icon(self):
+        """
+        Verifies that a deleted icon file only drops the icon, not the row.
+        """
+        save_snapshot(self.path, self.icon_dir, "All URLs", "default", [], [(1, "A", "u", ICON, None, 0)])
+        os.remove(os.path.join(self.icon_dir, icon_key(ICON)))
+        self.assertIsNone(load_snapshot(self.path, self.icon_dir)[3][0][3])
+
+
+if __name__ == '__main__':
+    unittest.main()
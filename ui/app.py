@@ -1,8 +1,9 @@
 import customtkinter as ctk
 import webbrowser
 import threading
-import requests
+import time
 import logging
+import sqlite3
 from io import BytesIO
 from urllib.parse import urlparse
 from PIL import Image
@@ -11,18 +12,52 @@ from tkinter import filedialog, messagebox
 # Import from our other modules
 from database.db_manager import DatabaseManager
 from utils.importers import ImportManager
+from utils.link_checker import LinkChecker, STATUS_UNREACHABLE
+from utils.extractors import ChapterChecker, ExtractorRegistry, format_chapter
+from utils.feeds import FeedChecker
+from utils.open_tracker import OpenEventBuffer
+from utils.view_snapshot import load_snapshot, save_snapshot
+from utils.http_client import HttpClient
+from utils.sync import SyncFolder
 import config
 
+# Pseudo-groups shown in the sidebar that are not rows in the groups table
+ALL_URLS_VIEW = "All URLs"
+DEAD_LINKS_VIEW = "Dead Links"
+
+# Sort menu label -> DatabaseManager sort key
+SORT_OPTIONS = {"Default order": "default", "Recently opened": "recent", "Most opened": "popular"}
+SORT_LABELS = {key: label for label, key in SORT_OPTIONS.items()}
+
+# Tag chips cycle through these states when clicked
+TAG_FILTER_CYCLE = {None: "include", "include": "exclude", "exclude": None}
+TAG_FILTER_STYLE = {None: ("", "#3a3a3a"), "include": ("+ ", "#2d7d46"), "exclude": ("− ", "#c42b1c")}
+
 class UrlManagerApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, start_time=None):
         super().__init__()
         self.title("URL Manager Pro")
         self.geometry("1000x650")
+        self.start_time = start_time if start_time is not None else time.perf_counter()
         
         # Initialize Logic
-        self.db = DatabaseManager(config.DB_NAME)
-        self.current_group = "All URLs"
+        # The database is opened in the background (see start_hydration); until then
+        # self.db is None and the window shows the snapshot of the last session.
+        self.db = None
+        self.http_client = None
+        self.current_group = ALL_URLS_VIEW
+        self.current_sort = "default"
         self.image_cache = []
+        self.visible_groups = []
+        self.visible_rows = []
+        self.selected_ids = set()
+        self.select_vars = {}
+        # Tag name -> "include" / "exclude"; included tags must all match unless tag_match_all is off
+        self.tag_filter = {}
+        self.tag_match_all = True
+        self.open_events = OpenEventBuffer(None, config.OPEN_EVENTS_FLUSH_INTERVAL,
+                                           config.OPEN_EVENTS_MAX_PENDING)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Setup Layout
         self.grid_columnconfigure(1, weight=1)
@@ -30,8 +65,17 @@ class UrlManagerApp(ctk.CTk):
 
         self.setup_sidebar()
         self.setup_main_area()
-        self.refresh_groups()
-        self.refresh_urls()
+
+        snapshot = load_snapshot(config.SNAPSHOT_FILE, config.SNAPSHOT_ICON_DIR)
+        if snapshot:
+            self.current_group, self.current_sort, groups, rows = snapshot
+            self.header_label.configure(text=self.current_group)
+            self.sort_menu.set(SORT_LABELS.get(self.current_sort, "Default order"))
+            self.update_filter_entry()
+            self.render_groups(groups)
+            self.render_urls(rows)
+
+        self.after(0, self.on_first_paint)
 
     def setup_sidebar(self):
         self.sidebar_frame = ctk.CTkFrame(self, width=200, corner_radius=0)
@@ -50,56 +94,189 @@ class UrlManagerApp(ctk.CTk):
         add_btn = ctk.CTkButton(self.sidebar_frame, text="+ Add Link", command=self.start_add_url_thread)
         add_btn.grid(row=2, column=0, padx=10, pady=5)
 
-        # Import Button
-        import_btn = ctk.CTkButton(self.sidebar_frame, text="Import Bookmarks", 
+        # Import / Maintenance Buttons
+        tools_frame = ctk.CTkFrame(self.sidebar_frame, fg_color="transparent")
+        tools_frame.grid(row=3, column=0, padx=10, pady=15, sticky="n")
+
+        import_btn = ctk.CTkButton(tools_frame, text="Import Bookmarks", 
                                    fg_color="#333", hover_color="#444", 
                                    command=self.import_bookmarks)
-        import_btn.grid(row=3, column=0, padx=10, pady=15, sticky="n")
+        import_btn.pack(pady=(0, 5))
+
+        self.check_links_btn = ctk.CTkButton(tools_frame, text="Check Links",
+                                             fg_color="#333", hover_color="#444",
+                                             command=self.start_link_check_thread)
+        self.check_links_btn.pack(pady=(0, 5))
+
+        self.check_chapters_btn = ctk.CTkButton(tools_frame, text="Check Chapters",
+                                                fg_color="#333", hover_color="#444",
+                                                command=self.start_chapter_check_thread)
+        self.check_chapters_btn.pack()
+
+        self.sync_btn = None
+        if config.SYNC_FOLDER:
+            self.sync_btn = ctk.CTkButton(tools_frame, text="Sync",
+                                          fg_color="#333", hover_color="#444",
+                                          command=self.start_sync_thread)
+            self.sync_btn.pack(pady=(5, 0))
 
         # Group List
         self.group_scroll = ctk.CTkScrollableFrame(self.sidebar_frame, label_text="Groups")
         self.group_scroll.grid(row=4, column=0, padx=10, pady=10, sticky="nsew")
 
+        # Tag Filters
+        self.tag_scroll = ctk.CTkScrollableFrame(self.sidebar_frame, label_text="Tags", height=120)
+        self.tag_scroll.grid(row=5, column=0, padx=10, pady=(0, 10), sticky="nsew")
+
         # Add Group Input
         self.entry_group = ctk.CTkEntry(self.sidebar_frame, placeholder_text="New Group Name")
-        self.entry_group.grid(row=5, column=0, padx=10, pady=5)
+        self.entry_group.grid(row=6, column=0, padx=10, pady=5)
         
         add_grp_btn = ctk.CTkButton(self.sidebar_frame, text="Create Group", 
                                     fg_color="#1f538d", hover_color="#14375e",
                                     command=self.create_group)
-        add_grp_btn.grid(row=6, column=0, padx=10, pady=(0, 20))
+        add_grp_btn.grid(row=7, column=0, padx=10, pady=(0, 20))
 
     def setup_main_area(self):
         self.main_frame = ctk.CTkFrame(self, corner_radius=0, fg_color="transparent")
         self.main_frame.grid(row=0, column=1, sticky="nsew", padx=20, pady=20)
         
-        self.header_label = ctk.CTkLabel(self.main_frame, text="Dashboard", font=ctk.CTkFont(size=24, weight="bold"))
-        self.header_label.pack(anchor="w", pady=(0, 20))
+        header_frame = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+        header_frame.pack(fill="x", pady=(0, 20))
+
+        self.header_label = ctk.CTkLabel(header_frame, text="Dashboard", font=ctk.CTkFont(size=24, weight="bold"))
+        self.header_label.pack(side="left")
+
+        self.sort_menu = ctk.CTkOptionMenu(header_frame, values=list(SORT_OPTIONS), width=150,
+                                           command=self.change_sort)
+        self.sort_menu.pack(side="right")
+
+        select_all_btn = ctk.CTkButton(header_frame, text="Select All", width=90,
+                                       fg_color="#333", hover_color="#444",
+                                       command=self.select_all)
+        select_all_btn.pack(side="right", padx=10)
+
+        # Only shown while cards are selected
+        self.bulk_bar = ctk.CTkFrame(self.main_frame)
+        self.bulk_label = ctk.CTkLabel(self.bulk_bar, text="")
+        self.bulk_label.pack(side="left", padx=10)
+
+        bulk_clear_btn = ctk.CTkButton(self.bulk_bar, text="Clear", width=60,
+                                       fg_color="#333", hover_color="#444",
+                                       command=self.clear_selection)
+        bulk_clear_btn.pack(side="right", padx=5, pady=5)
+
+        bulk_del_btn = ctk.CTkButton(self.bulk_bar, text="Delete", width=70,
+                                     fg_color="#c42b1c", hover_color="#a81b0f",
+                                     command=self.bulk_delete)
+        bulk_del_btn.pack(side="right", padx=5, pady=5)
+
+        bulk_rename_btn = ctk.CTkButton(self.bulk_bar, text="Rename...", width=80,
+                                        command=self.bulk_rename)
+        bulk_rename_btn.pack(side="right", padx=5, pady=5)
+
+        bulk_tag_btn = ctk.CTkButton(self.bulk_bar, text="Tag...", width=60,
+                                     command=self.bulk_tag)
+        bulk_tag_btn.pack(side="right", padx=5, pady=5)
+
+        self.bulk_move_menu = ctk.CTkOptionMenu(self.bulk_bar, values=["General"], width=140,
+                                                command=self.bulk_move)
+        self.bulk_move_menu.set("Move to...")
+        self.bulk_move_menu.pack(side="right", padx=5, pady=5)
+
+        # Only shown in the Dead Links view
+        self.entry_filter = ctk.CTkEntry(self.main_frame, placeholder_text="Filter dead links...")
+        self.entry_filter.bind("<KeyRelease>", lambda event: self.refresh_urls())
 
         self.url_container = ctk.CTkScrollableFrame(self.main_frame)
         self.url_container.pack(fill="both", expand=True)
 
+    def on_first_paint(self):
+        self.update_idletasks()
+        self.first_paint_ms = (time.perf_counter() - self.start_time) * 1000
+        logging.info(f"Startup: first paint after {self.first_paint_ms:.0f} ms")
+        self.start_hydration()
+
+    def start_hydration(self):
+        threading.Thread(target=self.process_hydration, daemon=True).start()
+
+    def process_hydration(self):
+        # init_db DDL and the first queries run here, off the Tk thread
+        try:
+            db = DatabaseManager(config.DB_NAME, store_snapshots=config.HISTORY_STORE_SNAPSHOTS,
+                                 node_id=config.SYNC_NODE_ID)
+            groups = db.get_groups(with_counts=True)
+            tags = db.get_tags(with_counts=True)
+            urls = self.fetch_urls(db)
+            http_client = HttpClient(config.HTTP_CACHE_DIR, config.HTTP_CACHE_MAX_BYTES, config.HTTP_POOL_SIZE)
+        except (sqlite3.Error, OSError) as e:
+            logging.error(f"Startup: could not open the library: {e}")
+            self.after(0, lambda err=e: self.hydration_failed(err))
+            return
+        self.after(0, lambda: self.finish_hydration(db, http_client, groups, tags, urls))
+
+    def hydration_failed(self, error):
+        # Without a database every action is disabled, so never fail silently
+        if messagebox.askretrycancel("Database Error",
+                                     f"Could not open the library:\n{error}\n\nTry again?"):
+            self.start_hydration()
+
+    def finish_hydration(self, db, http_client, groups, tags, urls):
+        self.db = db
+        self.http_client = http_client
+        self.open_events.db = db
+        self.open_events.start()
+        self.render_groups(groups)
+        self.render_tags(tags)
+        self.render_urls(urls)
+        live_ms = (time.perf_counter() - self.start_time) * 1000
+        logging.info(f"Startup: live data shown after {live_ms:.0f} ms (first paint {self.first_paint_ms:.0f} ms)")
+
+        # Pick up what other machines changed while this one was closed
+        if config.SYNC_FOLDER:
+            self.start_sync_thread()
+
+        # History compaction is housekeeping; keep it away from startup
+        self.after(config.HISTORY_COMPACT_DELAY_MS, self.start_history_compaction_thread)
+
     def refresh_groups(self):
+        if self.db is None:
+            return
+        self.render_groups(self.db.get_groups(with_counts=True))
+        self.render_tags(self.db.get_tags(with_counts=True))
+
+    def group_label(self, name, total, unread):
+        label = f"{name}  ({total})"
+        return label + f"  • {unread} new" if unread else label
+
+    def render_groups(self, groups):
+        """`groups` is a list of (name, total, unread) from get_groups(with_counts=True)."""
+        self.visible_groups = groups
         # Clear existing widgets
         for widget in self.group_scroll.winfo_children():
             widget.destroy()
 
         # 1. "All URLs" Button (Always at top, cannot be deleted)
-        btn_all = ctk.CTkButton(self.group_scroll, text="All URLs", 
+        all_label = self.group_label(ALL_URLS_VIEW, sum(g[1] for g in groups), sum(g[2] for g in groups))
+        btn_all = ctk.CTkButton(self.group_scroll, text=all_label, 
                                 fg_color="#444444", hover_color="#555555",
-                                command=lambda: self.select_group("All URLs"))
+                                command=lambda: self.select_group(ALL_URLS_VIEW))
         btn_all.pack(fill="x", pady=2)
 
+        btn_dead = ctk.CTkButton(self.group_scroll, text=DEAD_LINKS_VIEW,
+                                 fg_color="#444444", hover_color="#555555",
+                                 command=lambda: self.select_group(DEAD_LINKS_VIEW))
+        btn_dead.pack(fill="x", pady=2)
+
         # 2. Render User Groups
-        groups = self.db.get_groups()
-        for group in groups:
+        for group, total, unread in groups:
             # Create a container frame for the row
             row_frame = ctk.CTkFrame(self.group_scroll, fg_color="transparent")
             row_frame.pack(fill="x", pady=2)
 
             # Group Name Button (Takes up most space)
-            btn_group = ctk.CTkButton(row_frame, text=group, 
-                                      fg_color="#3a3a3a", hover_color="#505050",
+            btn_group = ctk.CTkButton(row_frame, text=self.group_label(group, total, unread), 
+                                      fg_color="#1f538d" if unread else "#3a3a3a", hover_color="#505050",
                                       command=lambda g=group: self.select_group(g))
             btn_group.bind("<Double-Button-1>", lambda event, g=group: self.open_group_urls(g))
             btn_group.pack(side="left", fill="x", expand=True, padx=(0, 5))
@@ -112,13 +289,80 @@ class UrlManagerApp(ctk.CTk):
                                         command=lambda g=group: self.delete_group_confirm(g))
                 btn_del.pack(side="right")
 
+    def render_tags(self, tags):
+        """`tags` is a list of (name, url_count) from get_tags(with_counts=True)."""
+        for widget in self.tag_scroll.winfo_children():
+            widget.destroy()
+        # Forget filters on tags that no longer exist
+        names = {name for name, _ in tags}
+        self.tag_filter = {name: mode for name, mode in self.tag_filter.items() if name in names}
+
+        if not tags:
+            ctk.CTkLabel(self.tag_scroll, text="No tags yet", text_color="gray").pack(pady=2)
+            return
+
+        match_switch = ctk.CTkSegmentedButton(self.tag_scroll, values=["Match all", "Match any"],
+                                              command=self.change_tag_match)
+        match_switch.set("Match all" if self.tag_match_all else "Match any")
+        match_switch.pack(fill="x", pady=(0, 4))
+
+        for name, count in tags:
+            row_frame = ctk.CTkFrame(self.tag_scroll, fg_color="transparent")
+            row_frame.pack(fill="x", pady=2)
+
+            prefix, color = TAG_FILTER_STYLE[self.tag_filter.get(name)]
+            btn_tag = ctk.CTkButton(row_frame, text=f"{prefix}{name}  ({count})",
+                                    fg_color=color, hover_color="#505050",
+                                    command=lambda t=name: self.toggle_tag_filter(t))
+            btn_tag.pack(side="left", fill="x", expand=True, padx=(0, 5))
+
+            btn_del = ctk.CTkButton(row_frame, text="×", width=30,
+                                    fg_color="#c42b1c", hover_color="#a81b0f",
+                                    command=lambda t=name: self.delete_tag_confirm(t))
+            btn_del.pack(side="right")
+
+    def toggle_tag_filter(self, name):
+        if self.db is None:
+            return
+        mode = TAG_FILTER_CYCLE[self.tag_filter.get(name)]
+        if mode:
+            self.tag_filter[name] = mode
+        else:
+            self.tag_filter.pop(name, None)
+        self.render_tags(self.db.get_tags(with_counts=True))
+        self.refresh_urls()
+
+    def change_tag_match(self, label):
+        self.tag_match_all = label == "Match all"
+        if any(mode == "include" for mode in self.tag_filter.values()):
+            self.refresh_urls()
+
+    def delete_tag_confirm(self, name):
+        if self.db is None:
+            return
+        if messagebox.askyesno("Delete Tag", f"Remove the tag '{name}' from every link?"):
+            self.db.delete_tag(name)
+            self.refresh_groups()
+            self.refresh_urls()
+
     def select_group(self, group_name):
+        if self.db is None:
+            return
         self.current_group = group_name
+        self.selected_ids.clear()
         self.header_label.configure(text=group_name)
+        self.update_filter_entry()
         self.refresh_urls()
 
+    def update_filter_entry(self):
+        """The text filter only applies to the Dead Links view."""
+        if self.current_group == DEAD_LINKS_VIEW:
+            self.entry_filter.pack(anchor="w", fill="x", pady=(0, 10), before=self.url_container)
+        else:
+            self.entry_filter.pack_forget()
+
     def open_group_urls(self, group_name):
-        if group_name == "All URLs":
+        if group_name in (ALL_URLS_VIEW, DEAD_LINKS_VIEW) or self.db is None:
             return
         
         urls = self.db.get_urls_by_group(group_name)
@@ -130,21 +374,28 @@ class UrlManagerApp(ctk.CTk):
             if not confirm:
                 return
 
-        for _, _, url, _ in urls:
-            webbrowser.open_new_tab(url)
+        for row in urls:
+            webbrowser.open_new_tab(row[2])
+            self.open_events.record(row[0], row[4])
 
     def create_group(self):
         name = self.entry_group.get().strip()
-        if name:
+        if name and self.db is not None:
             self.db.add_group(name)
             self.entry_group.delete(0, 'end')
             self.refresh_groups()
 
     def create_url_card(self, data, row, col):
-        uid, title, url, icon_blob = data
+        uid, title, url, icon_blob, latest_chapter, has_update = data
         card = ctk.CTkFrame(self.url_container, corner_radius=10)
         card.grid(row=row, column=col, padx=10, pady=10, sticky="ew")
 
+        select_var = ctk.BooleanVar(value=uid in self.selected_ids)
+        self.select_vars[uid] = select_var
+        chk_select = ctk.CTkCheckBox(card, text="", width=24, variable=select_var,
+                                     command=lambda: self.toggle_selection(uid, select_var.get()))
+        chk_select.pack(side="left", padx=(10, 0))
+
         try:
             if icon_blob:
                 img = Image.open(BytesIO(icon_blob))
@@ -169,6 +420,13 @@ class UrlManagerApp(ctk.CTk):
         lbl_url = ctk.CTkLabel(info_frame, text=url[:30]+"...", text_color="gray", anchor="w")
         lbl_url.pack(fill="x")
 
+        lbl_chapter = None
+        if latest_chapter is not None:
+            chapter_text = f"Ch. {format_chapter(latest_chapter)}" + (" (new)" if has_update else "")
+            lbl_chapter = ctk.CTkLabel(info_frame, text=chapter_text, anchor="w",
+                                       text_color="#2fa572" if has_update else "gray")
+            lbl_chapter.pack(fill="x")
+
         action_frame = ctk.CTkFrame(card, fg_color="transparent")
         action_frame.pack(side="right", padx=10)
 
@@ -177,14 +435,117 @@ class UrlManagerApp(ctk.CTk):
                                 command=lambda: self.delete_url_confirm(uid))
         btn_del.pack(side="right", padx=5)
 
-        btn_open = ctk.CTkButton(action_frame, text="Open", width=50, command=lambda u=url: webbrowser.open_new_tab(u))
+        btn_open = ctk.CTkButton(action_frame, text="Open", width=50, command=lambda: self.open_url(uid, url, lbl_chapter, latest_chapter))
         btn_open.pack(side="right", padx=5)
 
+    def open_url(self, uid, url, lbl_chapter, shown_chapter):
+        webbrowser.open_new_tab(url)
+        # Buffered; the database write happens later on a background thread
+        self.open_events.record(uid, shown_chapter)
+        if lbl_chapter:
+            lbl_chapter.configure(text=lbl_chapter.cget("text").replace(" (new)", ""), text_color="gray")
+
+    def change_sort(self, label):
+        self.current_sort = SORT_OPTIONS[label]
+        self.refresh_urls()
+
+    def on_close(self):
+        self.open_events.close()
+        if self.http_client is not None:
+            logging.info(f"HTTP cache stats: {self.http_client.stats()}")
+            self.http_client.close()
+        if self.db is not None:
+            try:
+                save_snapshot(config.SNAPSHOT_FILE, config.SNAPSHOT_ICON_DIR, self.current_group,
+                              self.current_sort, self.visible_groups, self.visible_rows,
+                              config.SNAPSHOT_MAX_ROWS)
+            except OSError as e:
+                logging.error(f"Could not save view snapshot: {e}")
+            if config.SYNC_FOLDER:
+                # Only this session's changes are written, so this stays quick
+                try:
+                    SyncFolder(config.SYNC_FOLDER).push(self.db)
+                except OSError as e:
+                    logging.error(f"Could not write sync delta: {e}")
+        self.destroy()
+
+    # --- MULTI-SELECT ---
+
+    def toggle_selection(self, uid, selected):
+        if selected:
+            self.selected_ids.add(uid)
+        else:
+            self.selected_ids.discard(uid)
+        self.update_bulk_bar()
+
+    def select_all(self):
+        for uid, var in self.select_vars.items():
+            var.set(True)
+            self.selected_ids.add(uid)
+        self.update_bulk_bar()
+
+    def clear_selection(self):
+        for var in self.select_vars.values():
+            var.set(False)
+        self.selected_ids.clear()
+        self.update_bulk_bar()
+
+    def update_bulk_bar(self):
+        if not self.selected_ids:
+            self.bulk_bar.pack_forget()
+            return
+        self.bulk_label.configure(text=f"{len(self.selected_ids)} selected")
+        self.bulk_move_menu.configure(values=[g[0] for g in self.visible_groups] or ["General"])
+        self.bulk_move_menu.set("Move to...")
+        self.bulk_bar.pack(fill="x", pady=(0, 10), before=self.url_container)
+
+    def finish_bulk_action(self):
+        # One refresh for the whole batch, not one per row
+        self.selected_ids.clear()
+        self.refresh_groups()
+        self.refresh_urls()
+
+    def bulk_delete(self):
+        if self.db is None or not self.selected_ids:
+            return
+        if not messagebox.askyesno("Delete Links", f"Delete {len(self.selected_ids)} selected links?"):
+            return
+        self.db.delete_urls(self.selected_ids)
+        self.finish_bulk_action()
+
+    def bulk_move(self, group_name):
+        if self.db is None or not self.selected_ids:
+            return
+        self.db.move_urls(self.selected_ids, group_name)
+        self.finish_bulk_action()
+
+    def bulk_rename(self):
+        if self.db is None or not self.selected_ids:
+            return
+        dialog = ctk.CTkInputDialog(text=f"New title for {len(self.selected_ids)} links:", title="Rename")
+        title = (dialog.get_input() or "").strip()
+        if title:
+            self.db.retitle_urls({uid: title for uid in self.selected_ids})
+            self.finish_bulk_action()
+
+    def bulk_tag(self):
+        if self.db is None or not self.selected_ids:
+            return
+        dialog = ctk.CTkInputDialog(text=f"Tags for {len(self.selected_ids)} links (comma separated):", title="Tag")
+        names = (dialog.get_input() or "").split(",")
+        if self.db.tag_urls(self.selected_ids, names):
+            self.finish_bulk_action()
+
     def delete_url_confirm(self, uid):
+        if self.db is None:
+            return
         self.db.delete_url(uid)
+        self.refresh_groups()
         self.refresh_urls()
     
     def delete_group_confirm(self, group_name):
+        if self.db is None:
+            return
         # Ask for confirmation
         confirm = messagebox.askyesno(
             "Delete Group", 
@@ -196,11 +557,13 @@ class UrlManagerApp(ctk.CTk):
             
             # If we deleted the group we are currently looking at, switch back to All URLs
             if self.current_group == group_name:
-                self.select_group("All URLs")
+                self.select_group(ALL_URLS_VIEW)
             else:
                 self.refresh_groups()
 
     def import_bookmarks(self):
+        if self.db is None:
+            return
         filepath = filedialog.askopenfilename(
             title="Select Bookmarks File",
             filetypes=[("HTML Files", "*.html"), ("All Files", "*.*")]
@@ -209,7 +572,7 @@ class UrlManagerApp(ctk.CTk):
         threading.Thread(target=self.process_import, args=(filepath,), daemon=True).start()
 
     def process_import(self, filepath):
-        data = ImportManager.parse_bookmarks_html(filepath)
+        data = ImportManager.parse_bookmarks_html(filepath, with_folders=config.IMPORT_FOLDERS_AS_TAGS)
         if not data: return
         count = self.db.bulk_add_urls(data)
         self.after(0, lambda: self.finish_import(count))
@@ -221,35 +584,152 @@ class UrlManagerApp(ctk.CTk):
 
     def start_add_url_thread(self):
         url = self.entry_url.get().strip()
-        if not url: return
+        if not url or self.db is None: return
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
-        threading.Thread(target=self.process_add_url, args=(url, self.current_group), daemon=True).start()
+        group = self.current_group if self.current_group not in (ALL_URLS_VIEW, DEAD_LINKS_VIEW) else "General"
+        threading.Thread(target=self.process_add_url, args=(url, group), daemon=True).start()
 
     def process_add_url(self, url, group):
         try:
             domain = urlparse(url).netloc
             icon_url = f"https://www.google.com/s2/favicons?domain={domain}&sz=64"
-            response = requests.get(icon_url, timeout=3)
+            response = self.http_client.get(icon_url, timeout=3)
             favicon_data = response.content if response.status_code == 200 else None
-            self.db.add_url(url, group if group != "All URLs" else "General", favicon_data)
+            self.db.add_url(url, group, favicon_data)
             self.after(0, self.finish_add_url)
         except Exception:
-            self.db.add_url(url, group if group != "All URLs" else "General", None)
+            self.db.add_url(url, group, None)
             self.after(0, self.finish_add_url)
 
+    def start_link_check_thread(self):
+        if self.db is None:
+            return
+        self.check_links_btn.configure(state="disabled", text="Checking...")
+        threading.Thread(target=self.process_link_check, daemon=True).start()
+
+    def process_link_check(self):
+        # Runs entirely off the Tk thread; file connections are opened per call
+        try:
+            results = LinkChecker(session=self.http_client.session,
+                                  max_workers=config.LINK_CHECK_WORKERS,
+                                  timeout=config.LINK_CHECK_TIMEOUT).check_all(self.db.get_urls_for_check())
+            self.db.update_link_status([(uid, status, final_url) for uid, status, final_url, _ in results])
+
+            rewritten = 0
+            if config.LINK_CHECK_REWRITE_MOVED:
+                moves = [(uid, final_url) for uid, _, final_url, moved in results if moved]
+                rewritten = self.db.rewrite_moved_urls(moves)
+
+            dead = sum(1 for _, status, _, _ in results if status == STATUS_UNREACHABLE or status >= 400)
+            self.after(0, lambda: self.finish_link_check(len(results), dead, rewritten))
+        finally:
+            self.after(0, lambda: self.check_links_btn.configure(state="normal", text="Check Links"))
+
+    def finish_link_check(self, checked, dead, rewritten):
+        messagebox.showinfo("Link Check Complete",
+                            f"Checked {checked} links.\n{dead} dead, {rewritten} moved links updated.")
+        self.refresh_urls()
+
+    def start_sync_thread(self):
+        if self.db is None or self.sync_btn is None:
+            return
+        self.sync_btn.configure(state="disabled", text="Syncing...")
+        threading.Thread(target=self.process_sync, daemon=True).start()
+
+    def process_sync(self):
+        try:
+            pulled, pushed = SyncFolder(config.SYNC_FOLDER).sync(self.db)
+        except OSError as e:
+            logging.error(f"Sync failed: {e}")
+            pulled = pushed = 0
+        self.after(0, lambda: self.finish_sync(pulled, pushed))
+
+    def finish_sync(self, pulled, pushed):
+        self.sync_btn.configure(state="normal", text="Sync")
+        logging.info(f"Sync: {pulled} changes received, {pushed} sent")
+        if pulled:
+            self.refresh_groups()
+            self.refresh_urls()
+
+    def start_chapter_check_thread(self):
+        if self.db is None:
+            return
+        self.check_chapters_btn.configure(state="disabled", text="Checking...")
+        threading.Thread(target=self.process_chapter_check, daemon=True).start()
+
+    def process_chapter_check(self):
+        checker = ChapterChecker(ExtractorRegistry(config.CHAPTER_EXTRACTORS),
+                                 session=self.http_client.session,
+                                 max_workers=config.CHAPTER_CHECK_WORKERS,
+                                 timeout=config.CHAPTER_CHECK_TIMEOUT,
+                                 max_bytes=config.CHAPTER_CHECK_MAX_BYTES)
+        feed_checker = FeedChecker(session=self.http_client.session,
+                                   max_workers=config.CHAPTER_CHECK_WORKERS,
+                                   timeout=config.CHAPTER_CHECK_TIMEOUT)
+
+        try:
+            # Feeds first: one request per site; pages only for sites without a usable feed
+            feed_results, discovered, feed_states, page_rows = feed_checker.check(
+                self.db.get_chapter_check_rows(), self.db.get_feeds(config.FEED_RETRY_DAYS)
+            )
+            self.db.save_discovered_feeds(discovered)
+            self.db.update_feed_state(feed_states)
+            self.db.mark_feed_matched([url_id for url_id, _, _ in feed_results])
+
+            results = feed_results + checker.check_all(page_rows)
+            self.db.save_chapter_results(results)
+            self.after(0, lambda: self.finish_chapter_check(len(results)))
+        finally:
+            self.after(0, lambda: self.check_chapters_btn.configure(state="normal", text="Check Chapters"))
+
+    def finish_chapter_check(self, found):
+        logging.info(f"Chapter check found chapters on {found} pages")
+        self.refresh_groups()
+        self.refresh_urls()
+
+    def start_history_compaction_thread(self):
+        threading.Thread(target=self.process_history_compaction, daemon=True).start()
+
+    def process_history_compaction(self):
+        deleted = self.db.compact_history(pause=0.05,
+                                          keep_all_days=config.HISTORY_KEEP_ALL_DAYS,
+                                          keep_daily_days=config.HISTORY_KEEP_DAILY_DAYS)
+        logging.info(f"History compaction removed {deleted} events")
+
     def finish_add_url(self):
         self.entry_url.delete(0, 'end')
+        self.refresh_groups()
         self.refresh_urls()
 
+    def fetch_urls(self, db, search=""):
+        """Reads the rows of the current view; safe to call from a worker thread."""
+        if self.current_group == DEAD_LINKS_VIEW:
+            return db.get_dead_links(search)
+        if self.tag_filter:
+            included = [name for name, mode in self.tag_filter.items() if mode == "include"]
+            excluded = [name for name, mode in self.tag_filter.items() if mode == "exclude"]
+            return db.get_urls_by_tags(all_of=included if self.tag_match_all else (),
+                                       any_of=() if self.tag_match_all else included,
+                                       none_of=excluded, group_name=self.current_group,
+                                       sort=self.current_sort)
+        return db.get_urls_by_group(self.current_group, self.current_sort)
+
     def refresh_urls(self):
+        if self.db is None:
+            return
+        self.render_urls(self.fetch_urls(self.db, self.entry_filter.get().strip()))
+
+    def render_urls(self, urls):
+        self.visible_rows = urls
+        # Rows that disappeared from the view can no longer be acted on
+        self.selected_ids &= {row[0] for row in urls}
+        self.select_vars = {}
+        self.update_bulk_bar()
         # Clear existing widgets in the scrollable frame
         for widget in self.url_container.winfo_children():
             widget.destroy()
         self.image_cache.clear()
-
-        # Fetch URLs from DB
-        urls = self.db.get_urls_by_group(self.current_group)
         
         col_count = 0
         row_count = 0
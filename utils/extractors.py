@@ -0,0 +1,149 @@
+import re
+import codecs
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+
+from utils.http_client import REQUEST_ERRORS, create_session
+
+# Used to pull the number out of text found by a CSS selector, e.g. "Chapter 412 - The Return"
+CHAPTER_NUMBER_RE = re.compile(r"(?:chapter|chap|ch|episode|ep)\.?\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+# A regex match this close to the end of the buffer may still be cut off ("Chapter 41|2")
+REGEX_TAIL_MARGIN = 256
+# How far back to re-scan each new chunk so matches spanning two chunks are not missed
+REGEX_OVERLAP = 2048
+
+
+def format_chapter(chapter):
+    """412.0 -> '412', 12.5 -> '12.5'"""
+    return str(int(chapter)) if float(chapter).is_integer() else str(chapter)
+
+
+class ChapterExtractor:
+    """
+    One site rule. Either `pattern` (a regex with a named group 'chapter' and an
+    optional group 'title') or `selector` (a CSS selector for the element holding the
+    latest chapter link) must be given. The first match in the page wins.
+    """
+    def __init__(self, pattern=None, selector=None):
+        if not pattern and not selector:
+            raise ValueError("An extractor needs a pattern or a selector")
+        self.pattern = re.compile(pattern, re.IGNORECASE | re.DOTALL) if pattern else None
+        self.selector = selector
+
+    def match(self, text, complete, start=0):
+        """
+        Returns (chapter, title) from the start of a page, or None if nothing is found yet.
+        `complete` tells whether `text` is the whole page or only the part read so far;
+        partial matches that might still be cut off are ignored until more text arrives.
+        Regex rules only search from `start`, so earlier text is not scanned twice.
+        """
+        if self.pattern:
+            return self._match_regex(text, complete, start)
+        return self._match_selector(text, complete)
+
+    def _match_regex(self, text, complete, start):
+        m = self.pattern.search(text, start)
+        if not m or (not complete and m.end() > len(text) - REGEX_TAIL_MARGIN):
+            return None
+        title = m.groupdict().get("title")
+        return float(m.group("chapter")), title.strip() if title else None
+
+    def _match_selector(self, text, complete):
+        soup = BeautifulSoup(text, "html.parser")
+        for el in soup.select(self.selector):
+            # An element is only finished if the parser saw something after it
+            node = el
+            while node is not None and node.next_sibling is None:
+                node = node.parent
+            if node is None and not complete:
+                return None
+            el_text = el.get_text(" ", strip=True)
+            m = CHAPTER_NUMBER_RE.search(el_text)
+            if m:
+                return float(m.group(1)), el_text
+        return None
+
+
+class ExtractorRegistry:
+    """Maps domains to extractors. Subdomains fall back to their parent domain, then to '*'."""
+    def __init__(self, rules):
+        self.extractors = {domain: ChapterExtractor(**rule) for domain, rule in rules.items()}
+
+    def for_url(self, url):
+        domain = urlparse(url).netloc.lower().split(":")[0]
+        parts = domain.split(".")
+        for i in range(len(parts) - 1):
+            extractor = self.extractors.get(".".join(parts[i:]))
+            if extractor:
+                return extractor
+        return self.extractors.get("*")
+
+
+def extract_from_stream(chunks, extractor, max_bytes, encoding="utf-8"):
+    """
+    Feeds byte `chunks` to `extractor` and stops consuming them as soon as it matches
+    or `max_bytes` have been read. Returns ((chapter, title) or None, bytes_read).
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    text = ""
+    bytes_read = 0
+    # Selector rules re-parse the whole buffer, so only try again once it has doubled;
+    # the total parsing work then stays within about twice the bytes read
+    next_parse = 0
+    for chunk in chunks:
+        bytes_read += len(chunk)
+        scanned = len(text)
+        text += decoder.decode(chunk)
+        if extractor.pattern or len(text) >= next_parse:
+            result = extractor.match(text, False, max(0, scanned - REGEX_OVERLAP))
+            if result:
+                return result, bytes_read
+            next_parse = 2 * len(text)
+        if bytes_read >= max_bytes:
+            # The page goes on, so a match at the very end could still be cut off
+            return extractor.match(text, False), bytes_read
+    text += decoder.decode(b"", final=True)
+    return extractor.match(text, True), bytes_read
+
+
+class ChapterChecker:
+    def __init__(self, registry, session=None, max_workers=8, timeout=10, max_bytes=512 * 1024):
+        self.registry = registry
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.session = session or create_session(max_workers)
+
+    def check_url(self, url_id, url):
+        """Returns (url_id, chapter, title), or None if the page has no recognisable chapter."""
+        extractor = self.registry.for_url(url)
+        if not extractor:
+            return None
+        try:
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                if response.status_code != 200:
+                    return None
+                # requests assumes latin-1 for text/* without a charset, which is wrong for most sites
+                encoding = "utf-8"
+                if "charset=" in response.headers.get("Content-Type", ""):
+                    encoding = response.encoding
+                result, bytes_read = extract_from_stream(
+                    response.iter_content(chunk_size=8192), extractor, self.max_bytes, encoding
+                )
+        except REQUEST_ERRORS + (LookupError,) as e:
+            logging.info(f"Chapter check failed for {url}: {e}")
+            return None
+
+        logging.info(f"Chapter check read {bytes_read} bytes of {url}")
+        if not result:
+            return None
+        return (url_id, result[0], result[1])
+
+    def check_all(self, url_rows):
+        """Checks every (url_id, url) pair concurrently and drops pages without a match."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = pool.map(lambda row: self.check_url(*row), url_rows)
+            return [r for r in results if r]
@@ -0,0 +1,201 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+from xml.etree.ElementTree import XMLPullParser, ParseError
+from bs4 import BeautifulSoup
+
+from utils.http_client import REQUEST_ERRORS, create_session
+from utils.extractors import CHAPTER_NUMBER_RE
+
+FEED_TYPES = {"application/rss+xml", "application/atom+xml", "application/feed+xml"}
+# Tried at the site root when a page does not advertise its feed
+COMMON_FEED_PATHS = ["/feed", "/rss", "/feed.xml", "/rss.xml", "/atom.xml", "/index.xml"]
+# Feed links live in <head>; give up on pages whose head is larger than this
+MAX_HEAD_BYTES = 64 * 1024
+
+
+def feed_domain(url):
+    """Key under which a feed is shared: 'www.site.com' and 'site.com' use the same feed."""
+    domain = urlparse(url).netloc.lower()
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def find_feed_links(html, base_url):
+    """Returns the absolute URLs of every <link rel="alternate"> feed in `html`."""
+    soup = BeautifulSoup(html, "html.parser")
+    links = []
+    for link in soup.find_all("link", href=True):
+        rel = link.get("rel") or []
+        if "alternate" in rel and (link.get("type") or "").lower() in FEED_TYPES:
+            links.append(urljoin(base_url, link["href"]))
+    return links
+
+
+def parse_feed_entries(chunks, stop_at_id=None):
+    """
+    Incrementally parses RSS or Atom bytes into (entry_id, title, link) tuples, newest first.
+    Stops pulling chunks once the entry with id `stop_at_id` is reached, because
+    everything after it was already seen on the previous poll.
+    """
+    parser = XMLPullParser(events=("end",))
+    entries = []
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            for _, el in parser.read_events():
+                tag = el.tag.rsplit("}", 1)[-1]
+                if tag not in ("item", "entry"):
+                    continue
+                entry = _read_entry(el)
+                el.clear()
+                if stop_at_id is not None and entry[0] == stop_at_id:
+                    return entries
+                entries.append(entry)
+    except ParseError as e:
+        logging.info(f"Feed parse error: {e}")
+    return entries
+
+
+def _read_entry(el):
+    fields = {}
+    for child in el:
+        name = child.tag.rsplit("}", 1)[-1]
+        if name == "link":
+            # Atom keeps the URL in href, RSS in the element text
+            fields.setdefault("link", child.get("href") or (child.text or "").strip())
+        elif name in ("guid", "id", "title"):
+            fields[name] = (child.text or "").strip()
+    entry_id = fields.get("guid") or fields.get("id") or fields.get("link")
+    return entry_id, fields.get("title", ""), fields.get("link", "")
+
+
+def match_entries(entries, tracked):
+    """
+    Assigns feed entries to tracked series. An entry belongs to the tracked URL whose
+    path is the longest prefix of the entry's link (e.g. /series/foo -> /series/foo/chapter-413).
+    Returns (url_id, chapter, title) with the highest chapter found per URL.
+    """
+    prefixes = sorted(((urlparse(url).path.rstrip("/"), url_id) for url_id, url in tracked),
+                      key=lambda p: len(p[0]), reverse=True)
+    best = {}
+    for _, title, link in entries:
+        m = CHAPTER_NUMBER_RE.search(title)
+        if not m:
+            continue
+        path = urlparse(link).path
+        for prefix, url_id in prefixes:
+            if prefix and (path == prefix or path.startswith(prefix + "/")):
+                chapter = float(m.group(1))
+                if url_id not in best or chapter > best[url_id][1]:
+                    best[url_id] = (url_id, chapter, title)
+                break
+    return list(best.values())
+
+
+class FeedChecker:
+    def __init__(self, session=None, max_workers=8, timeout=10):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = session or create_session(max_workers)
+
+    def discover(self, page_url):
+        """Returns the feed URL for the site of `page_url`, or None if it has none."""
+        try:
+            with self.session.get(page_url, timeout=self.timeout, stream=True) as response:
+                head = b""
+                for chunk in response.iter_content(chunk_size=8192):
+                    head += chunk
+                    if b"</head>" in head.lower() or len(head) >= MAX_HEAD_BYTES:
+                        break
+            links = find_feed_links(head, response.url)
+            if links:
+                return links[0]
+
+            root = f"{urlparse(page_url).scheme}://{urlparse(page_url).netloc}"
+            for path in COMMON_FEED_PATHS:
+                with self.session.get(root + path, timeout=self.timeout, stream=True) as response:
+                    if response.status_code != 200:
+                        continue
+                    start = next(response.iter_content(chunk_size=512), b"").lstrip()[:256]
+                    if start.startswith(b"<?xml") or b"<rss" in start or b"<feed" in start:
+                        return response.url
+        except REQUEST_ERRORS as e:
+            logging.info(f"Feed discovery failed for {page_url}: {e}")
+        return None
+
+    def poll(self, feed_url, etag=None, last_modified=None, last_entry_id=None):
+        """
+        Conditionally fetches a feed. Returns (entries, etag, last_modified), where
+        entries is [] when the feed has not changed, or None if the feed is broken.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            with self.session.get(feed_url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304:
+                    return [], etag, last_modified
+                if response.status_code != 200:
+                    return None, None, None
+                entries = parse_feed_entries(response.iter_content(chunk_size=8192), last_entry_id)
+                return entries, response.headers.get("ETag"), response.headers.get("Last-Modified")
+        except REQUEST_ERRORS as e:
+            logging.info(f"Feed poll failed for {feed_url}: {e}")
+            return None, None, None
+
+    def check(self, rows, feeds):
+        """
+        Runs one update pass over `rows` of (url_id, url, latest_chapter, feed_matched).
+        A feed only replaces the page check for series it has carried an entry for
+        (feed_matched, or matched in this pass); a site feed full of unrelated posts
+        must not silence the other series on that site.
+        `feeds` maps domain -> (feed_url, etag, last_modified, last_entry_id) as stored.
+
+        Returns (chapter_results, discovered, feed_states, page_rows):
+          chapter_results - (url_id, chapter, title) found in feeds
+          discovered      - (domain, feed_url or None) to store
+          feed_states     - (domain, etag, last_modified, last_entry_id) after polling
+          page_rows       - (url_id, url) that still need a full page check
+        """
+        by_domain = {}
+        for url_id, url, latest_chapter, feed_matched in rows:
+            by_domain.setdefault(feed_domain(url), []).append((url_id, url, latest_chapter, feed_matched))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # 1. Discover feeds once per site, not once per URL
+            unknown = [d for d in by_domain if d not in feeds]
+            found = pool.map(lambda d: self.discover(by_domain[d][0][1]), unknown)
+            discovered = list(zip(unknown, found))
+            feeds = dict(feeds)
+            for domain, feed_url in discovered:
+                feeds[domain] = (feed_url, None, None, None)
+
+            # 2. One conditional request per site covers all of its tracked series
+            polled_domains = [d for d in by_domain if feeds[d][0]]
+            polls = list(pool.map(lambda d: self.poll(*feeds[d]), polled_domains))
+
+        chapter_results, feed_states, page_rows = [], [], []
+        feed_ok = set()
+        for domain, (entries, etag, last_modified) in zip(polled_domains, polls):
+            if entries is None:
+                # Broken feed: forget it so it is rediscovered later
+                discovered.append((domain, None))
+                continue
+            feed_ok.add(domain)
+            newest_id = entries[0][0] if entries else feeds[domain][3]
+            feed_states.append((domain, etag, last_modified, newest_id))
+            # Series without a baseline get theirs from the page below instead
+            tracked = [(u, url) for u, url, latest, _ in by_domain[domain] if latest is not None]
+            chapter_results += match_entries(entries, tracked)
+
+        # 3. Sites without a feed, series with no baseline yet, and series the feed
+        #    has never mentioned need their page read
+        matched = {result[0] for result in chapter_results}
+        for domain, domain_rows in by_domain.items():
+            for url_id, url, latest_chapter, feed_matched in domain_rows:
+                covered = feed_matched or url_id in matched
+                if domain not in feed_ok or latest_chapter is None or not covered:
+                    page_rows.append((url_id, url))
+        return chapter_results, discovered, feed_states, page_rows
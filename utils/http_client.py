@@ -0,0 +1,280 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from email.utils import parsedate_to_datetime
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Only these response headers are kept with a cached body
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control", "Expires", "Date")
+# Upper bound for the Last-Modified heuristic when a server sends no explicit lifetime
+HEURISTIC_MAX_SECONDS = 24 * 3600
+# What fetching one stored URL can raise: urllib3 rejects malformed URLs (e.g. a host
+# label over 63 characters) with errors requests does not wrap
+REQUEST_ERRORS = (requests.RequestException, urllib3.exceptions.HTTPError, ValueError)
+
+
+def create_session(pool_size=10):
+    """Builds a requests session whose connection pool fits `pool_size` workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "URLManagerPro/1.0"
+    return session
+
+
+def _http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_cache_control(value):
+    """'max-age=60, no-cache' -> {'max-age': '60', 'no-cache': True}"""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else True
+    return directives
+
+
+def freshness_lifetime(headers, now):
+    """Seconds a response may be served without asking the server again."""
+    cc = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in cc:
+        return 0
+    if "max-age" in cc:
+        try:
+            return max(0, int(cc["max-age"]))
+        except ValueError:
+            return 0
+    date = _http_date(headers.get("Date")) or now
+    expires = _http_date(headers.get("Expires"))
+    if headers.get("Expires") is not None:
+        # An invalid Expires (e.g. "0") means already expired
+        return max(0, expires - date) if expires else 0
+    last_modified = _http_date(headers.get("Last-Modified"))
+    if last_modified:
+        return min(HEURISTIC_MAX_SECONDS, max(0, (date - last_modified) / 10))
+    return 0
+
+
+class CachedResponse:
+    """The parts of a response callers use, whether it came from the network or disk."""
+    def __init__(self, url, status_code, content, headers, from_cache):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = CaseInsensitiveDict(headers)
+        self.from_cache = from_cache
+
+
+class HttpCache:
+    """
+    On-disk response store. Bodies are content-addressed files under objects/ (identical
+    bodies are stored once); index.db maps URLs to bodies and tracks freshness and last use.
+    The total body size is kept under `max_bytes` by evicting least recently used entries.
+    """
+    def __init__(self, cache_dir, max_bytes=50 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "index.db"), check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                body_hash TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_hash ON entries(body_hash)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS objects (
+                hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def _object_path(self, body_hash):
+        return os.path.join(self.objects_dir, body_hash[:2], body_hash[2:])
+
+    def lookup(self, url):
+        """Returns (status, headers, body, expires_at) or None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body_hash, status, headers, expires_at FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            if not row:
+                return None
+            try:
+                with open(self._object_path(row[0]), "rb") as f:
+                    body = f.read()
+            except OSError:
+                # Body went missing on disk; treat as a miss and drop the entry
+                self.conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+                self._release(row[0])
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+            return row[1], json.loads(row[2]), body, row[3]
+
+    def store(self, url, status, headers, body, expires_at):
+        body_hash = hashlib.sha256(body).hexdigest()
+        kept = {name: headers[name] for name in STORED_HEADERS if name in headers}
+        with self.lock:
+            path = self._object_path(body_hash)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(body)
+                os.replace(tmp_path, path)
+            old = self.conn.execute("SELECT body_hash FROM entries WHERE url = ?", (url,)).fetchone()
+            self.conn.execute("INSERT OR IGNORE INTO objects (hash, size) VALUES (?, ?)", (body_hash, len(body)))
+            self.conn.execute("""
+                INSERT OR REPLACE INTO entries (url, body_hash, status, headers, expires_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (url, body_hash, status, json.dumps(kept), expires_at, time.time()))
+            if old and old[0] != body_hash:
+                self._release(old[0])
+            self._evict()
+            self.conn.commit()
+
+    def refresh(self, url, headers, expires_at):
+        """Records a 304 revalidation: new validators and a new expiry for the same body."""
+        with self.lock:
+            row = self.conn.execute("SELECT headers FROM entries WHERE url = ?", (url,)).fetchone()
+            if not row:
+                return
+            kept = json.loads(row[0])
+            kept.update({name: headers[name] for name in STORED_HEADERS if name in headers})
+            self.conn.execute("UPDATE entries SET headers = ?, expires_at = ? WHERE url = ?",
+                              (json.dumps(kept), expires_at, url))
+            self.conn.commit()
+
+    def total_bytes(self):
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def _evict(self):
+        """Drops least recently used entries until the bodies fit in max_bytes. Caller holds the lock."""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        while total > self.max_bytes:
+            row = self.conn.execute("SELECT url, body_hash FROM entries ORDER BY last_access LIMIT 1").fetchone()
+            if not row:
+                break
+            self.conn.execute("DELETE FROM entries WHERE url = ?", (row[0],))
+            total -= self._release(row[1])
+
+    def _release(self, body_hash):
+        """Deletes a body once no entry points to it. Returns the bytes freed."""
+        if self.conn.execute("SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone():
+            return 0
+        row = self.conn.execute("SELECT size FROM objects WHERE hash = ?", (body_hash,)).fetchone()
+        self.conn.execute("DELETE FROM objects WHERE hash = ?", (body_hash,))
+        try:
+            os.remove(self._object_path(body_hash))
+        except OSError:
+            pass
+        return row[0] if row else 0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class HttpClient:
+    """
+    The app's single way onto the network. `session` is a pooled session shared by
+    the streaming checkers; `get` adds the persistent cache for whole-body downloads.
+    """
+    def __init__(self, cache_dir, max_bytes=50 * 1024 * 1024, pool_size=10, timeout=10):
+        self.session = create_session(pool_size)
+        self.cache = HttpCache(cache_dir, max_bytes)
+        self.timeout = timeout
+        self.stats_lock = threading.Lock()
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    def _count(self, name):
+        with self.stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, url, timeout=None):
+        """
+        Returns a CachedResponse for `url`. Fresh cache entries are served without a
+        request; stale ones are revalidated with If-None-Match / If-Modified-Since; if the
+        network fails, a stale copy is better than nothing and is returned instead.
+        """
+        now = time.time()
+        cached = self.cache.lookup(url)
+        if cached:
+            status, headers, body, expires_at = cached
+            if now < expires_at:
+                self._count("hits")
+                return CachedResponse(url, status, body, headers, True)
+
+        request_headers = {}
+        if cached:
+            if headers.get("ETag"):
+                request_headers["If-None-Match"] = headers["ETag"]
+            if headers.get("Last-Modified"):
+                request_headers["If-Modified-Since"] = headers["Last-Modified"]
+
+        try:
+            response = self.session.get(url, headers=request_headers, timeout=timeout or self.timeout)
+        except requests.RequestException:
+            if cached:
+                self._count("hits")
+                return CachedResponse(url, status, body, headers, True)
+            raise
+
+        if response.status_code == 304 and cached:
+            self._count("revalidations")
+            self.cache.refresh(url, response.headers, now + freshness_lifetime(response.headers, now))
+            return CachedResponse(url, status, body, headers, True)
+
+        self._count("misses")
+        cc = parse_cache_control(response.headers.get("Cache-Control"))
+        if response.status_code == 200 and "no-store" not in cc:
+            try:
+                self.cache.store(url, response.status_code, response.headers, response.content,
+                                 now + freshness_lifetime(response.headers, now))
+            except (OSError, sqlite3.Error) as e:
+                logging.warning(f"Could not cache {url}: {e}")
+        return CachedResponse(response.url, response.status_code, response.content, response.headers, False)
+
+    def stats(self):
+        """Hit rate counts fresh hits and successful revalidations as served from cache."""
+        with self.stats_lock:
+            served = self.hits + self.revalidations
+            total = served + self.misses
+            return {
+                "hits": self.hits,
+                "revalidations": self.revalidations,
+                "misses": self.misses,
+                "hit_rate": served / total if total else 0.0,
+                "bytes": self.cache.total_bytes(),
+            }
+
+    def close(self):
+        self.session.close()
+        self.cache.close()
@@ -3,7 +3,21 @@ from bs4 import BeautifulSoup
 
 class ImportManager:
     @staticmethod
-    def parse_bookmarks_html(filepath):
+    def folder_path(link):
+        """Names of the folders containing `link`, outermost first (the browser toolbar folder is skipped)."""
+        path = []
+        for dl in link.find_parents('dl'):
+            header = dl.find_previous_sibling()
+            if header and header.name == 'h3' and not header.get('personal_toolbar_folder'):
+                path.append(header.text.strip())
+        return tuple(reversed(path))
+
+    @staticmethod
+    def parse_bookmarks_html(filepath, with_folders=False):
+        """
+        Returns (title, url, group_name) tuples. With `with_folders`, each tuple also
+        carries the bookmark's folder path, which bulk_add_urls stores as tags.
+        """
         extracted_data = []
         try:
             with open(filepath, "r", encoding="utf-8") as f:
@@ -22,7 +36,10 @@ class ImportManager:
                         group_name = prev_tag.text
                 
                 if url and title:
-                    extracted_data.append((title, url, group_name))
+                    if with_folders:
+                        extracted_data.append((title, url, group_name, ImportManager.folder_path(link)))
+                    else:
+                        extracted_data.append((title, url, group_name))
         except Exception as e:
             logging.error(f"Parsing Error: {e}")
         return extracted_data
\ No newline at end of file
@@ -0,0 +1,48 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from utils.http_client import REQUEST_ERRORS, create_session
+
+# Servers that refuse HEAD usually answer with one of these
+HEAD_FALLBACK_CODES = {403, 405, 501}
+PERMANENT_REDIRECT_CODES = {301, 308}
+
+# Status stored when the request never got an HTTP answer (DNS, timeout, ...)
+STATUS_UNREACHABLE = 0
+
+
+class LinkChecker:
+    def __init__(self, session=None, max_workers=10, timeout=5):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = session or create_session(max_workers)
+
+    def check_url(self, url_id, url):
+        """
+        Checks one URL and returns (url_id, status_code, final_url, moved_permanently).
+        HEAD is tried first; GET is only used when the server rejects HEAD.
+        """
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            if response.status_code in HEAD_FALLBACK_CODES:
+                response.close()
+                # stream=True so we only read the headers, never the page body
+                response = self.session.get(url, allow_redirects=True, timeout=self.timeout, stream=True)
+            response.close()
+        except REQUEST_ERRORS as e:
+            logging.info(f"Link check failed for {url}: {e}")
+            return (url_id, STATUS_UNREACHABLE, None, False)
+
+        # Only trust the final URL if every hop was permanent, it landed on a working page,
+        # and that page is not just the site root (dead pages are often sent to the homepage)
+        moved = bool(response.history) and all(
+            r.status_code in PERMANENT_REDIRECT_CODES for r in response.history
+        ) and 200 <= response.status_code < 300 and urlparse(response.url).path.strip("/") != ""
+        final_url = response.url if response.url != url else None
+        return (url_id, response.status_code, final_url, moved and final_url is not None)
+
+    def check_all(self, url_rows):
+        """Checks every (url_id, url) pair concurrently over the shared session."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(lambda row: self.check_url(*row), url_rows))
@@ -0,0 +1,65 @@
+import logging
+import threading
+from datetime import datetime
+
+
+class OpenEventBuffer:
+    """
+    Collects "link opened" events in memory and writes them to the database in
+    batches, so clicking Open never waits on SQLite. A batch is written when
+    `max_pending` events are waiting, every `flush_interval` seconds, and on close().
+    """
+    def __init__(self, db, flush_interval=5.0, max_pending=50):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending = []
+        self.lock = threading.Lock()
+        # Keeps batches in order when a size flush and a timer flush overlap
+        self.flush_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.timer_thread = None
+
+    def start(self):
+        self.timer_thread = threading.Thread(target=self._run_timer, daemon=True)
+        self.timer_thread.start()
+
+    def record(self, url_id, chapter=None):
+        """
+        Called on the Tk thread; only touches memory. `chapter` is the latest chapter the
+        card showed when clicked, which is what the user has actually seen.
+        """
+        with self.lock:
+            self.pending.append((url_id, datetime.now().isoformat(), chapter))
+            full = len(self.pending) >= self.max_pending
+        if full:
+            threading.Thread(target=self.flush, daemon=True).start()
+
+    def flush(self):
+        """Writes every pending event in one transaction. Returns the number written."""
+        if self.db is None:
+            # The app has not finished opening the database yet
+            return 0
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, []
+            if not batch:
+                return 0
+            if not self.db.record_opens(batch):
+                # Keep the events for the next attempt rather than losing them
+                with self.lock:
+                    self.pending = batch + self.pending
+                return 0
+            return len(batch)
+
+    def close(self):
+        """Stops the timer and writes whatever is left. Called once at shutdown."""
+        self.stop_event.set()
+        if self.timer_thread:
+            self.timer_thread.join(timeout=self.flush_interval)
+        written = self.flush()
+        logging.info(f"Flushed {written} open events at shutdown")
+
+    def _run_timer(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
@@ -0,0 +1,83 @@
+import os
+import gzip
+import json
+import logging
+
+DELTA_VERSION = 2
+DELTA_SUFFIX = ".json.gz"
+
+
+class SyncFolder:
+    """
+    Syncs libraries through a folder every machine can reach (network share, Dropbox,
+    Syncthing, USB stick...), with no server. Each machine only writes into its own
+    sub-folder, <folder>/<node_id>/, one gzip delta file per export named after the last
+    journal sequence it holds, and reads everyone else's sub-folders. No file is ever
+    written by two machines, so the folder needs no locking.
+    """
+    def __init__(self, folder):
+        self.folder = folder
+
+    def push(self, db):
+        """Writes this machine's changes since the last push. Returns the number of changes written."""
+        since = db.get_sync_cursor("exported_seq")
+        last_seq, changes = db.get_journal(since)
+        if changes:
+            node = db.get_node_id()
+            node_dir = os.path.join(self.folder, node)
+            os.makedirs(node_dir, exist_ok=True)
+            path = os.path.join(node_dir, f"{last_seq:012d}{DELTA_SUFFIX}")
+            data = {"version": DELTA_VERSION, "node": node, "from": since, "to": last_seq, "changes": changes}
+            # Write to a temp name first so other machines never read a half-written delta
+            tmp_path = path + ".tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        if last_seq != since:
+            db.set_sync_cursor("exported_seq", last_seq)
+        return len(changes)
+
+    def pull(self, db):
+        """Applies every peer delta not seen yet, oldest first. Returns the number of changes applied."""
+        if not os.path.isdir(self.folder):
+            return 0
+        node = db.get_node_id()
+        applied = 0
+        for peer in sorted(os.listdir(self.folder)):
+            peer_dir = os.path.join(self.folder, peer)
+            if peer == node or not os.path.isdir(peer_dir):
+                continue
+            position = db.get_sync_cursor(f"peer:{peer}")
+            for last_seq, path in self._deltas(peer_dir):
+                if last_seq <= position:
+                    continue
+                try:
+                    with gzip.open(path, "rt", encoding="utf-8") as f:
+                        data = json.load(f)
+                    if data.get("version") != DELTA_VERSION:
+                        raise ValueError(f"unsupported version {data.get('version')}")
+                except (OSError, ValueError, EOFError) as e:
+                    # Possibly still being copied in; stop here so this peer's deltas stay in order
+                    logging.warning(f"Skipping sync from {peer} at {path}: {e}")
+                    break
+                result = db.apply_changes(peer, data["changes"], last_seq)
+                if result is None:
+                    break
+                applied += result
+                position = last_seq
+        return applied
+
+    def sync(self, db):
+        """Pulls, then pushes. Returns (pulled, pushed)."""
+        pulled = self.pull(db)
+        return pulled, self.push(db)
+
+    def _deltas(self, peer_dir):
+        deltas = []
+        for name in os.listdir(peer_dir):
+            if name.endswith(DELTA_SUFFIX):
+                try:
+                    deltas.append((int(name[:-len(DELTA_SUFFIX)]), os.path.join(peer_dir, name)))
+                except ValueError:
+                    continue
+        return sorted(deltas)
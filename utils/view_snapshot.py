@@ -0,0 +1,73 @@
+import os
+import json
+import hashlib
+import logging
+
+SNAPSHOT_VERSION = 2
+
+
+def icon_key(blob):
+    return hashlib.sha1(blob).hexdigest() if blob else None
+
+
+def save_snapshot(path, icon_dir, group, sort, groups, rows, max_rows=60):
+    """
+    Writes the current view so the next launch can draw it before the database is opened.
+    `groups` are (name, total, unread) sidebar entries and `rows` are card tuples (id, title, url, favicon_blob, latest_chapter, has_update);
+    favicons go to `icon_dir` under their content hash and the snapshot only keeps the key.
+    """
+    rows = rows[:max_rows]
+    os.makedirs(icon_dir, exist_ok=True)
+    keys = set()
+    stored_rows = []
+    for uid, title, url, blob, latest_chapter, has_update in rows:
+        key = icon_key(blob)
+        if key:
+            keys.add(key)
+            icon_path = os.path.join(icon_dir, key)
+            if not os.path.exists(icon_path):
+                with open(icon_path, "wb") as f:
+                    f.write(blob)
+        stored_rows.append([uid, title, url, key, latest_chapter, has_update])
+
+    data = {"version": SNAPSHOT_VERSION, "group": group, "sort": sort,
+            "groups": groups, "rows": stored_rows}
+    # Write to a temp file first so a crash mid-write never leaves a broken snapshot
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+    # Icons of rows that scrolled out of the snapshot are no longer needed
+    for name in os.listdir(icon_dir):
+        if name not in keys:
+            os.remove(os.path.join(icon_dir, name))
+
+
+def load_snapshot(path, icon_dir):
+    """
+    Returns (group, sort, groups, rows) with favicon blobs restored, or None when
+    there is no usable snapshot.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != SNAPSHOT_VERSION:
+            return None
+        rows = []
+        for uid, title, url, key, latest_chapter, has_update in data["rows"]:
+            blob = None
+            if key:
+                try:
+                    with open(os.path.join(icon_dir, key), "rb") as f:
+                        blob = f.read()
+                except OSError:
+                    pass
+            rows.append((uid, title, url, blob, latest_chapter, has_update))
+        groups = [tuple(g) for g in data["groups"]]
+        return data["group"], data["sort"], groups, rows
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.warning(f"Ignoring unreadable view snapshot: {e}")
+        return None